@@ -0,0 +1,96 @@
+"""
+Offline benchmark of near-duplicate cv detection (NearDuplicateIndex): time per cv for growing number of cv
+and quality on synthetic data. Share of cv are copies of earlier ones with trivial edits
+(changed phone, appended line, dropped paragraph, different case), as after re-application or upload
+of the same cv in other format.
+
+Run from repo root:
+    python -m benchmarks.bench_dedup --sizes 1000 5000 20000 --duplicates 0.2 --threshold 0.8
+Exit code is 1 if recall on near-copies is below --min-recall or there are false merges.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks.bench_pipeline import synthetic_cv
+from module1.convert_functions.dedup import DEFAULT_THRESHOLD, NearDuplicateIndex
+
+
+def _edit(rnd: random.Random, paragraphs: list) -> list:
+    paragraphs = list(paragraphs)
+    edit = rnd.choice(("phone", "append", "drop", "case"))
+    if edit == "phone":
+        paragraphs[1] = f"Телефон: +7 900 {rnd.randint(1000000, 9999999)}"
+    elif edit == "append":
+        paragraphs.append("Готов к командировкам.")
+    elif edit == "drop" and len(paragraphs) > 8:
+        paragraphs.pop(rnd.randrange(4, len(paragraphs)))
+    else:
+        paragraphs = [text.upper() for text in paragraphs]
+    return paragraphs
+
+
+def generate_texts(count: int, duplicate_share: float, seed: int = 0) -> tuple:
+    """
+    :return: (list of (key, text), {key: original key} for generated duplicates)
+    """
+    rnd = random.Random(seed)
+    documents, originals = [], {}
+    for i in range(count):
+        key = f"cv_{i:06d}"
+        if documents and rnd.random() < duplicate_share:
+            source_key, source = rnd.choice(documents)
+            documents.append((key, _edit(rnd, source)))
+            originals[key] = originals.get(source_key, source_key)
+        else:
+            documents.append((key, synthetic_cv(rnd, i)))
+    return [(key, " ".join(paragraphs)) for key, paragraphs in documents], originals
+
+
+def run_benchmark(count: int, duplicate_share: float, threshold: float, seed: int = 0) -> dict:
+    """
+    :return: {items, seconds, items_per_sec, us_per_item, clusters, recall, false_merges}
+    """
+    texts, originals = generate_texts(count, duplicate_share, seed)
+    index = NearDuplicateIndex(threshold)
+    start = time.perf_counter()
+    representatives = {key: index.add(key, text)[0] for key, text in texts}
+    seconds = time.perf_counter() - start
+    found = sum(1 for key, original in originals.items()
+                if representatives[key] != key
+                and originals.get(representatives[key], representatives[key]) == original)
+    false_merges = sum(1 for key, representative in representatives.items()
+                       if representative != key
+                       and originals.get(key, key) != originals.get(representative, representative))
+    return {"items": count, "seconds": round(seconds, 3), "items_per_sec": round(count / seconds, 1),
+            "us_per_item": round(seconds / count * 1e6, 1), "clusters": len(index),
+            "recall": round(found / len(originals), 4) if originals else None, "false_merges": false_merges}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Оффлайн бенчмарк поиска почти одинаковых CV")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="количество CV")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="доля CV-дубликатов")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="порог сходства")
+    parser.add_argument("--min-recall", type=float, default=0.93, help="минимальная полнота поиска копий")
+    parser.add_argument("--output", help="путь для JSON с результатами")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        results[size] = result = run_benchmark(size, args.duplicates, args.threshold)
+        print(f"{size:7} шт. {result['seconds']:8.2f} с {result['us_per_item']:8.1f} мкс/шт.  "
+              f"кластеров {result['clusters']:7}  полнота {result['recall']}  ложных склеек {result['false_merges']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, ensure_ascii=False, indent=4)
+        print(f"[INFO] Результаты сохранены в: {args.output}")
+    violations = [f"{size} шт.: полнота {result['recall']} < {args.min_recall}" for size, result in results.items()
+                  if result["recall"] is not None and result["recall"] < args.min_recall]
+    violations += [f"{size} шт.: ложных склеек {result['false_merges']}" for size, result in results.items()
+                   if result["false_merges"]]
+    if violations:
+        print(f"[ERROR] Качество поиска дубликатов ниже цели: {'; '.join(violations)}")
+        sys.exit(1)
@@ -0,0 +1,145 @@
+"""
+Offline benchmark of text extraction per format: registered native extractors vs Aspose fallback.
+The same synthetic cv are written as .docx, .odt, .html and .txt, every (format, backend) pair runs
+in a separate process to measure its own peak RSS and the cost of loading the library (first file).
+
+Run from repo root:
+    python -m benchmarks.bench_extraction --cvs 200
+    python -m benchmarks.bench_extraction --formats docx odt --backends native aspose --output extraction.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import zipfile
+from html import escape as html_escape
+from xml.sax.saxutils import escape
+
+from benchmarks.bench_pipeline import _peak_rss_mb, synthetic_cv, write_docx
+
+FORMATS = ("docx", "odt", "html", "txt")
+BACKENDS = ("native", "aspose")
+
+_ODT_MANIFEST = ('<?xml version="1.0" encoding="UTF-8"?>'
+                 '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" '
+                 'manifest:version="1.2">'
+                 '<manifest:file-entry manifest:full-path="/" '
+                 'manifest:media-type="application/vnd.oasis.opendocument.text"/>'
+                 '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+                 '</manifest:manifest>')
+
+
+def write_odt(path: str, paragraphs: list) -> None:
+    """
+    Writes minimal .odt without third-party libraries
+    """
+    body = "".join(f"<text:p>{escape(text)}</text:p>" for text in paragraphs)
+    content = ('<?xml version="1.0" encoding="UTF-8"?>'
+               '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+               'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+               f'<office:body><office:text>{body}</office:text></office:body></office:document-content>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as odt:
+        odt.writestr(zipfile.ZipInfo("mimetype"), "application/vnd.oasis.opendocument.text",
+                     compress_type=zipfile.ZIP_STORED)
+        odt.writestr("META-INF/manifest.xml", _ODT_MANIFEST)
+        odt.writestr("content.xml", content)
+
+
+def write_html(path: str, paragraphs: list) -> None:
+    body = "".join(f"<p>{html_escape(text)}</p>" for text in paragraphs)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>CV</title>'
+                f'<style>p {{margin: 0}}</style></head><body>{body}</body></html>')
+
+
+def write_txt(path: str, paragraphs: list) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(paragraphs))
+
+
+WRITERS = {"docx": write_docx, "odt": write_odt, "html": write_html, "txt": write_txt}
+
+
+def generate_files(folder: str, cvs: int, formats: tuple = FORMATS, seed: int = 0) -> dict:
+    """
+    :return: dict {format: list of paths}, files of every format have the same text
+    """
+    rnd = random.Random(seed)
+    documents = [synthetic_cv(rnd, i) for i in range(cvs)]
+    files = {}
+    for name in formats:
+        os.makedirs(os.path.join(folder, name), exist_ok=True)
+        files[name] = []
+        for i, paragraphs in enumerate(documents):
+            path = os.path.join(folder, name, f"cv_{i:05d}.{name}")
+            WRITERS[name](path, paragraphs)
+            files[name].append(path)
+    return files
+
+
+def _run_case(name: str, backend: str, files: list, results: multiprocessing.Queue) -> None:
+    from module1.convert_functions.convert_functions import clean_text
+    from module1.convert_functions.extractors import extract_with_aspose, get_extractor
+
+    extractor = get_extractor(f".{name}") if backend == "native" else extract_with_aspose
+    if extractor is None:
+        results.put({"error": "нет извлечения для формата"})
+        return
+    start = time.perf_counter()
+    first_file = None
+    chars = 0
+    try:
+        for path in files:
+            chars += len(clean_text(extractor(path)))
+            if first_file is None:
+                first_file = time.perf_counter() - start
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    seconds = time.perf_counter() - start
+    results.put({"items": len(files), "seconds": round(seconds, 3), "items_per_sec": round(len(files) / seconds, 2),
+                 "first_file_seconds": round(first_file, 3), "chars": chars, "peak_rss_mb": round(_peak_rss_mb(), 1)})
+
+
+def run_benchmarks(cvs: int, formats: tuple = FORMATS, backends: tuple = BACKENDS, seed: int = 0) -> dict:
+    """
+    :return: dict {params, results: {format: {backend: {items, seconds, items_per_sec, first_file_seconds,
+    chars, peak_rss_mb} or {error}}}}
+    """
+    files = generate_files(tempfile.mkdtemp(prefix="bench_extraction_"), cvs, formats, seed)
+    report = {"params": {"cvs": cvs, "formats": list(formats), "backends": list(backends)}, "results": {}}
+    context = multiprocessing.get_context("spawn")
+    for name in formats:
+        report["results"][name] = {}
+        for backend in backends:
+            queue = context.Queue()
+            process = context.Process(target=_run_case, args=(name, backend, files[name], queue))
+            process.start()
+            process.join()
+            result = queue.get() if process.exitcode == 0 else {"error": f"exit code {process.exitcode}"}
+            report["results"][name][backend] = result
+            if "error" in result:
+                print(f"{name:5} {backend:7} ошибка: {result['error']}")
+                continue
+            print(f"{name:5} {backend:7} {result['items']:6} шт. {result['seconds']:9.2f} с "
+                  f"{result['items_per_sec']:9.2f} шт./с  первый файл {result['first_file_seconds']:7.3f} с  "
+                  f"пик RSS {result['peak_rss_mb']:8.1f} МБ")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Оффлайн бенчмарк извлечения текста по форматам")
+    parser.add_argument("--cvs", type=int, default=100, help="количество синтетических CV каждого формата")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--output", help="путь для JSON с результатами")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.cvs, tuple(args.formats), tuple(args.backends))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"[INFO] Результаты сохранены в: {args.output}")
@@ -0,0 +1,245 @@
+"""
+Offline throughput benchmark of screening (module1) and question generation (module2).
+Synthetic .docx CV and vacancy table are generated in a temp folder, LLM calls go to local FakeLLMServer,
+so no network and API quota are used. Every scenario runs in a separate process to measure its own peak RSS.
+
+Run from repo root:
+    python -m benchmarks.bench_pipeline --cvs 100 --latency 0.2 --workers 8
+    python -m benchmarks.bench_pipeline --save-baseline          # write benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --baseline               # compare with committed benchmarks/baseline.json
+benchmarks/baseline.json is committed and generated with default parameters, compare with the same parameters.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from module1.convert_functions.fake_server import FakeLLMServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SCENARIOS = ("extraction", "screening_sequential", "screening_concurrent", "questions")
+
+SKILLS = ["Linux", "Windows Server", "RAID", "BIOS", "IPMI", "СХД", "виртуализация", "VMware", "сети", "Cisco",
+          "мониторинг", "Zabbix", "резервное копирование", "ЦОД", "электропитание", "кондиционирование",
+          "Python", "SQL", "Excel", "документация", "ITIL", "Ansible", "Docker", "Kubernetes"]
+POSITIONS = ["Инженер ЦОД", "Системный администратор", "Инженер поддержки", "Продавец-консультант",
+             "Специалист по обслуживанию серверов", "Техник", "Менеджер по продажам"]
+NAMES = ["Иван Петров", "Анна Смирнова", "Сергей Кузнецов", "Мария Иванова", "Алексей Попов", "Ольга Соколова"]
+
+_CONTENT_TYPES = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                  '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                  '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                  '<Default Extension="xml" ContentType="application/xml"/>'
+                  '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+                  'officedocument.wordprocessingml.document.main+xml"/></Types>')
+_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+         'officeDocument" Target="word/document.xml"/></Relationships>')
+
+
+def _paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def write_docx(path: str, paragraphs: list, table: list = None) -> None:
+    """
+    Writes minimal .docx without third-party libraries
+    :param path: output path
+    :param paragraphs: list of paragraph texts
+    :param table: list of rows (list of cell texts)
+    """
+    body = "".join(_paragraph(text) for text in paragraphs)
+    if table:
+        rows = "".join("<w:tr>" + "".join(f"<w:tc>{_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>"
+                       for row in table)
+        body += f"<w:tbl>{rows}</w:tbl>"
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{body}<w:sectPr/></w:body></w:document>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _RELS)
+        docx.writestr("word/document.xml", document)
+
+
+def synthetic_cv(rnd: random.Random, i: int) -> list:
+    """
+    :return: list of paragraph texts of synthetic cv number i
+    """
+    paragraphs = [rnd.choice(NAMES), f"Телефон: +7 900 {rnd.randint(1000000, 9999999)}",
+                  f"Почта: candidate{i}@example.com", "Опыт работы"]
+    year = rnd.randint(2005, 2018)
+    for _ in range(rnd.randint(1, 4)):
+        end = min(year + rnd.randint(1, 5), 2025)
+        paragraphs.append(f"{year} - {end} {rnd.choice(POSITIONS)}. "
+                          f"Обязанности: {', '.join(rnd.sample(SKILLS, 5))}.")
+        year = end
+    paragraphs.append(f"Навыки: {', '.join(rnd.sample(SKILLS, 8))}")
+    paragraphs.extend("Участвовал в проектах по модернизации инфраструктуры и внедрению регламентов." for _ in
+                      range(rnd.randint(5, 30)))
+    return paragraphs
+
+
+def generate_dataset(folder: str, cvs: int, seed: int = 0) -> tuple:
+    """
+    Generates vacancy table and synthetic cv
+    :param folder: output folder
+    :param cvs: number of cv
+    :param seed: random seed
+    :return: (cv folder, vacancy path)
+    """
+    rnd = random.Random(seed)
+    cv_folder = os.path.join(folder, "cv")
+    os.makedirs(cv_folder, exist_ok=True)
+    vacancy_path = os.path.join(folder, "vacancy.docx")
+    write_docx(vacancy_path, ["Описание вакансии"], [
+        ["Название", "Ведущий специалист по обслуживанию ЦОД"],
+        ["Требования", "Опыт обслуживания серверов, знание RAID, BIOS, IPMI, Linux, СХД, сетей"],
+        ["Опыт работы", "от 3 лет"],
+        ["Образование", "Высшее техническое"],
+        ["Ключевые навыки", ", ".join(SKILLS[:10])],
+        ["Условия", "Полный день, офис в Москве"],
+        ])
+    for i in range(cvs):
+        write_docx(os.path.join(cv_folder, f"cv_{i:05d}.docx"), synthetic_cv(rnd, i))
+    return cv_folder, vacancy_path
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / scale
+
+
+def _run_scenario(name: str, params: dict, results: multiprocessing.Queue) -> None:
+    from module1.convert_functions.text_cache import TextCache
+    from module1.convert_functions.extraction import iter_extracted
+    from module1.convert_functions.metrics import pipeline_metrics
+
+    cache = TextCache(tempfile.mkdtemp(prefix="bench_cv_text_"))
+    cv_folder, vacancy_path = params["cv_folder"], params["vacancy_path"]
+    files = sorted(os.path.join(cv_folder, file) for file in os.listdir(cv_folder))
+    count = len(files)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "extraction":
+            for _ in iter_extracted(files, cache=cache):
+                pass
+        elif name.startswith("screening"):
+            from module1.module1 import cv_validation
+            workers = 1 if name == "screening_sequential" else params["workers"]
+            cv_validation(cv_folder, vacancy_path, max_workers=workers, requests_per_second=1e6,
+                          cv_text_cache=cache)
+        elif name == "questions":
+            from module2.module2 import question_block
+            count = min(count, params["question_cvs"])
+            json_path = os.path.join(tempfile.mkdtemp(prefix="bench_screening_"), "screening.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({file: {"answer": True} for file in files[:count]}, f, ensure_ascii=False)
+            question_block(vacancy_path, json_path, cv_text_cache=cache)
+    seconds = time.perf_counter() - start
+    results.put({"scenario": name, "items": count, "seconds": round(seconds, 3),
+                 "items_per_sec": round(count / seconds, 2), "peak_rss_mb": round(_peak_rss_mb(), 1),
+                 "stages": pipeline_metrics.totals()["stages"]})
+
+
+def run_benchmarks(cvs: int, latency: float, error_rate: float, workers: int, question_cvs: int,
+                   scenarios: tuple = SCENARIOS, seed: int = 0, repeat: int = 3) -> dict:
+    """
+    :param repeat: runs of every scenario, the best is kept (short scenarios vary by ~10% between runs)
+    :return: dict {params, results: {scenario: {items, seconds, items_per_sec, peak_rss_mb, stages}}}
+    """
+    workspace = tempfile.mkdtemp(prefix="bench_pipeline_")
+    cv_folder, vacancy_path = generate_dataset(workspace, cvs, seed)
+    params = {"cv_folder": cv_folder, "vacancy_path": vacancy_path, "workers": workers, "question_cvs": question_cvs}
+    report = {"params": {"cvs": cvs, "latency": latency, "error_rate": error_rate, "workers": workers,
+                         "question_cvs": question_cvs, "repeat": repeat}, "results": {}}
+    context = multiprocessing.get_context("spawn")
+    with FakeLLMServer(latency=latency, error_rate=error_rate, error_status=503, seed=seed) as server:
+        os.environ.update({"LLM_BASE_URL": server.url, "OPENROUTER_API_KEY": "benchmark", "LLM_CACHE": "off"})
+        for name in scenarios:
+            result = None
+            for _ in range(repeat):
+                queue = context.Queue()
+                process = context.Process(target=_run_scenario, args=(name, params, queue))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    result = None
+                    break
+                run = queue.get()
+                if result is None or run["items_per_sec"] > result["items_per_sec"]:
+                    result = run
+            if result is None:
+                report["results"][name] = {"error": f"exit code {process.exitcode}"}
+                continue
+            report["results"][name] = {key: value for key, value in result.items() if key != "scenario"}
+            print(f"{name:22} {result['items']:6} шт. {result['seconds']:9.2f} с "
+                  f"{result['items_per_sec']:9.2f} шт./с  пик RSS {result['peak_rss_mb']:8.1f} МБ")
+    return report
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    :param tolerance: allowed relative drop of items_per_sec
+    :return: list of regression descriptions
+    """
+    regressions = []
+    if baseline.get("params") != report["params"]:
+        print(f"[WARN] Параметры отличаются от базовой линии: {baseline.get('params')} -> {report['params']}")
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "items_per_sec" not in base:
+            print(f"{name:22} нет в базовой линии")
+            continue
+        if "items_per_sec" not in result:
+            regressions.append(f"{name}: {result.get('error', 'нет результата')}")
+            continue
+        change = result["items_per_sec"] / base["items_per_sec"] - 1
+        print(f"{name:22} {base['items_per_sec']:9.2f} -> {result['items_per_sec']:9.2f} шт./с ({change:+.1%})")
+        if change < -tolerance:
+            regressions.append(f"{name}: {change:+.1%}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Оффлайн бенчмарк пропускной способности модулей 1 и 2")
+    parser.add_argument("--cvs", type=int, default=50, help="количество синтетических CV")
+    parser.add_argument("--latency", type=float, default=0.2, help="задержка ответа заглушки LLM, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов заглушки с ошибкой 503")
+    parser.add_argument("--workers", type=int, default=8, help="max_workers для конкурентного режима")
+    parser.add_argument("--question-cvs", type=int, default=10, help="количество CV для генерации вопросов")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="путь для JSON с результатами")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="JSON базовой линии для сравнения, по умолчанию benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="сохранить результат как базовую линию")
+    parser.add_argument("--repeat", type=int, default=3, help="запусков каждого сценария, берется лучший")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="допустимое падение пропускной способности")
+    args = parser.parse_args()
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"[ERROR] Нет файла базовой линии: {args.baseline}, сохраните его через --save-baseline")
+        sys.exit(1)
+
+    report = run_benchmarks(args.cvs, args.latency, args.error_rate, args.workers, args.question_cvs,
+                            tuple(args.scenarios), repeat=args.repeat)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"[INFO] Результаты сохранены в: {path}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"[ERROR] Регрессия производительности: {'; '.join(regressions)}")
+            sys.exit(1)
@@ -0,0 +1,113 @@
+"""
+Startup budget of hr_pipeline CLI: wall time of short commands and import time of pipeline modules,
+each measured in a fresh interpreter (best of --repeat runs). Heavy libraries loaded by a command are listed,
+--help and rendering of a saved report must not load any of them.
+
+Run from repo root:
+    python -m benchmarks.bench_startup                  # exit code 1 if a budget is exceeded
+    python -m benchmarks.bench_startup --budget 0.5 --import-budget 1.5 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("openai", "httpx", "aspose", "rich", "pydantic", "translitua")
+MODULES = ("hr_pipeline", "module1.module1", "module2.module2", "module3.module3", "orchestrator")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SAMPLE_REPORT = {"vacancy": "Инженер ЦОД", "summary": "Кандидат уверенно отвечает на технические вопросы.",
+                  "analysis_report": [{"category": "hard_skills_questions", "question": "Что такое RAID 10?",
+                                       "expected_response": None, "answer": "Зеркало из страйпов",
+                                       "evaluation": {"score": 9, "passed": True, "feedback": "Верно"}}]}
+
+# печатает загруженные тяжелые библиотеки после выполнения команды
+_PROBE = ("import sys, runpy, atexit, json\n"
+          "atexit.register(lambda: sys.stderr.write('\\nHEAVY ' + json.dumps(sorted({{name.split('.')[0] "
+          "for name in sys.modules}} & set({heavy})))))\n"
+          "sys.argv = ['hr_pipeline'] + {argv}\n"
+          "runpy.run_module('hr_pipeline', run_name='__main__')\n")
+
+
+def _run(code: str) -> tuple:
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    heavy = []
+    for line in process.stderr.splitlines():
+        if line.startswith("HEAVY "):
+            heavy = json.loads(line[len("HEAVY "):])
+    return seconds, heavy
+
+
+def measure_command(argv: list, repeat: int) -> dict:
+    """
+    :return: {seconds (best of repeat), heavy_modules}
+    """
+    code = _PROBE.format(heavy=repr(HEAVY_MODULES), argv=repr(argv))
+    runs = [_run(code) for _ in range(repeat)]
+    return {"seconds": round(min(seconds for seconds, _ in runs), 3), "heavy_modules": runs[0][1]}
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    """
+    :return: {seconds (best of repeat) of python -c "import module" minus bare interpreter start}
+    """
+    bare = min(_run("pass")[0] for _ in range(repeat))
+    seconds = min(_run(f"import {module}")[0] for _ in range(repeat))
+    return {"seconds": round(max(seconds - bare, 0.0), 3)}
+
+
+def run_benchmarks(repeat: int = 3) -> dict:
+    report_path = os.path.join(tempfile.mkdtemp(prefix="bench_startup_"), "final_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(_SAMPLE_REPORT, f, ensure_ascii=False)
+    commands = {"--help": ["--help"], "screen --help": ["screen", "--help"], "report": ["report", report_path]}
+    results = {"commands": {}, "imports": {}}
+    for name, argv in commands.items():
+        results["commands"][name] = result = measure_command(argv, repeat)
+        print(f"{name:16} {result['seconds']:7.3f} с  тяжелые библиотеки: {', '.join(result['heavy_modules']) or '-'}")
+    for module in MODULES:
+        results["imports"][module] = result = measure_import(module, repeat)
+        print(f"import {module:20} {result['seconds']:7.3f} с")
+    return results
+
+
+def check_budget(results: dict, budget: float, import_budget: float) -> list:
+    """
+    :param budget: max seconds of short commands, they also must not load heavy libraries
+    :param import_budget: max import seconds of every pipeline module
+    :return: list of violations
+    """
+    violations = []
+    for name, result in results["commands"].items():
+        if result["seconds"] > budget:
+            violations.append(f"{name}: {result['seconds']} с > {budget} с")
+        if result["heavy_modules"]:
+            violations.append(f"{name}: загружены {', '.join(result['heavy_modules'])}")
+    for module, result in results["imports"].items():
+        if result["seconds"] > import_budget:
+            violations.append(f"import {module}: {result['seconds']} с > {import_budget} с")
+    return violations
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Бюджет времени запуска CLI hr-pipeline")
+    parser.add_argument("--repeat", type=int, default=3, help="запусков на замер, берется лучший")
+    parser.add_argument("--budget", type=float, default=0.5, help="лимит времени коротких команд, с")
+    parser.add_argument("--import-budget", type=float, default=1.0, help="лимит импорта модуля, с")
+    parser.add_argument("--output", help="путь для JSON с результатами")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        print(f"[INFO] Результаты сохранены в: {args.output}")
+    violations = check_budget(results, args.budget, args.import_budget)
+    if violations:
+        print(f"[ERROR] Бюджет запуска превышен: {'; '.join(violations)}")
+        sys.exit(1)
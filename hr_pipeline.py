@@ -0,0 +1,252 @@
+"""
+Single command line entry point: screening (module1), questions (module2), interview and report (module3).
+Modules of the pipeline and their heavy dependencies (openai, aspose, pydantic, rich) are imported inside
+subcommands that need them, so --help and rendering of a saved report start without loading them.
+Import-time budget is checked by benchmarks/bench_startup.py.
+Run from repo root:
+    python -m hr_pipeline screen <folder with cv> <vacancy.docx> --output screening.json --workers 4
+    python -m hr_pipeline matrix <folder with cv> <vacancy1.docx> <vacancy2.docx> --output matrix.json
+    python -m hr_pipeline questions <vacancy.docx> --screening screening.json --output questions.json
+    python -m hr_pipeline interview --questions questions.json --candidate <cv path> --vacancy-file <vacancy.docx>
+    python -m hr_pipeline report final_report.json
+    python -m hr_pipeline report --store sessions.sqlite3 --session <cv path> --output final_report.json
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _screening_options(args: argparse.Namespace) -> dict:
+    return {"max_workers": args.workers, "requests_per_second": args.rps, "checkpoint_path": args.checkpoint,
+            "batch_token_budget": args.batch_tokens, "prefilter_threshold": args.prefilter,
+            "dedup_threshold": args.dedup}
+
+
+def _select_questions(data: Dict, candidate: Optional[str]) -> tuple:
+    """
+    :param data: questions of one candidate {category: [...]} or output of questions command {cv path: {...}}
+    :param candidate: cv path, required if file has questions of several candidates
+    :return: (cv path or None, questions_data)
+    """
+    if all(isinstance(value, list) for value in data.values()):
+        return candidate, data
+    candidates = {file: questions for file, questions in data.items() if questions}
+    if candidate is None:
+        if len(candidates) != 1:
+            raise ValueError(f"В файле вопросы для {len(candidates)} кандидатов, укажите --candidate")
+        candidate = next(iter(candidates))
+    if candidate not in candidates:
+        raise ValueError(f"Нет вопросов для кандидата {candidate}")
+    return candidate, candidates[candidate]
+
+
+def render_report(report: Dict) -> str:
+    """
+    Plain text view of final report of build_final_report, no third-party libraries
+    :param report: {vacancy, summary, analysis_report}
+    :return: text for terminal
+    """
+    lines = [f"Вакансия: {report.get('vacancy', '')}", "", "Итог:", report.get("summary") or "-", ""]
+    items = report.get("analysis_report", [])
+    scores = [item["evaluation"]["score"] for item in items
+              if isinstance(item.get("evaluation", {}).get("score"), (int, float))]
+    passed = sum(1 for item in items if item.get("evaluation", {}).get("passed"))
+    lines.append(f"Вопросов: {len(items)}, зачтено: {passed}"
+                 + (f", средний балл: {sum(scores) / len(scores):.1f}" if scores else ""))
+    category = None
+    for item in items:
+        if item.get("category") != category:
+            category = item.get("category")
+            lines += ["", f"[{category}]"]
+        evaluation = item.get("evaluation", {})
+        mark = "+" if evaluation.get("passed") else "-"
+        score = evaluation.get("score", evaluation.get("error"))
+        # модель может не вернуть оценку, тогда score равен None
+        lines.append(f" {mark} {'—' if score is None else str(score):>4} | {item.get('question')}")
+        if evaluation.get("feedback"):
+            lines.append(f"          {evaluation['feedback']}")
+    return "\n".join(lines)
+
+
+def cmd_screen(args: argparse.Namespace) -> int:
+    from module1.convert_functions.convert_functions import write_json
+    from module1.module1 import cv_validation
+
+    results = cv_validation(args.folder_cv, args.vacancy, **_screening_options(args))
+    write_json(args.output, results)
+    accepted = sum(1 for result in results.values() if result.get("answer"))
+    print(f"[INFO] Подходят {accepted} из {len(results)}, результаты сохранены в: {args.output}")
+    return 0
+
+
+def render_matrix(matrix: Dict[str, Dict[str, dict]]) -> str:
+    """
+    Plain text candidate x vacancy table: + suitable, - not suitable, ! error
+    :param matrix: {cv path: {vacancy path: result}} of multi_vacancy_validation
+    :return: text for terminal
+    """
+    vacancies = list(dict.fromkeys(vacancy for row in matrix.values() for vacancy in row))
+    width = max([len(os.path.basename(file)) for file in matrix] + [len("CV")])
+    lines = [f"{i + 1:>3}. {vacancy}" for i, vacancy in enumerate(vacancies)]
+    lines += ["", f"{'CV':<{width}} " + " ".join(f"{i + 1:>3}" for i in range(len(vacancies)))]
+    for file, row in matrix.items():
+        marks = ["!" if "error" in row.get(vacancy, {"error": None}) else "+" if row[vacancy].get("answer") else "-"
+                 for vacancy in vacancies]
+        lines.append(f"{os.path.basename(file):<{width}} " + " ".join(f"{mark:>3}" for mark in marks))
+    return "\n".join(lines)
+
+
+def cmd_matrix(args: argparse.Namespace) -> int:
+    from module1.convert_functions.convert_functions import write_json
+    from module1.module1 import multi_vacancy_validation
+
+    matrix = multi_vacancy_validation(args.folder_cv, args.vacancies, max_workers=args.workers,
+                                      requests_per_second=args.rps)
+    write_json(args.output, matrix)
+    print(render_matrix(matrix))
+    print(f"[INFO] Матрица {len(matrix)} CV x {len(args.vacancies)} вакансий сохранена в: {args.output}")
+    return 0
+
+
+def cmd_questions(args: argparse.Namespace) -> int:
+    from module1.convert_functions.convert_functions import write_json
+    from module2.module2 import question_block, questions_from_screening
+
+    if args.screening:
+        results = question_block(args.vacancy, args.screening, use_question_bank=not args.no_bank)
+    elif args.folder_cv:
+        results = questions_from_screening(args.folder_cv, args.vacancy, screening_options=_screening_options(args),
+                                           use_question_bank=not args.no_bank)
+    else:
+        raise ValueError("Нужен --screening (результат screen) или --folder-cv для скрининга")
+    write_json(args.output, results)
+    print(f"[INFO] Вопросы для {sum(1 for value in results.values() if value)} кандидатов "
+          f"сохранены в: {args.output}")
+    return 0
+
+
+def cmd_interview(args: argparse.Namespace) -> int:
+    from module3.module3 import run_console_interview
+    from module3.session_store import SessionStore
+
+    store = SessionStore(args.store) if args.store else None
+    session_id = args.session
+    if store is not None and session_id and store.has_session(session_id):
+        record = store.load_session(session_id)
+        questions_data, vacancy = record["questions_data"], record["vacancy"]
+    else:
+        if not args.questions:
+            raise ValueError("Нужен --questions или существующая сессия --store/--session")
+        candidate, questions_data = _select_questions(_read_json(args.questions), args.candidate)
+        if args.vacancy_file:
+            from module1.convert_functions.vacancy_profile import load_vacancy_profile
+            vacancy = load_vacancy_profile(args.vacancy_file)
+        else:
+            vacancy = args.vacancy
+        session_id = session_id or candidate
+        if store is not None and not session_id:
+            raise ValueError("Для --store нужен --session или --candidate")
+    os.makedirs(args.output, exist_ok=True)
+    run_console_interview(questions_data, vacancy, session_store=store if session_id else None,
+                          session_id=session_id, output_dir=args.output)
+    return 0
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    if args.report:
+        report = _read_json(args.report)
+    elif args.store and args.session:
+        from module3.module3 import InterviewState, build_final_report
+        from module3.session_store import SessionStore
+
+        store = SessionStore(args.store)
+        record = store.load_session(args.session)
+        state = InterviewState(record["questions_data"], store, args.session, record["vacancy"])
+        report = build_final_report(state.collected_data_by_category, record["questions_data"], record["vacancy"],
+                                    batch=args.batch)
+        if args.output:
+            from module1.convert_functions.convert_functions import write_json
+            write_json(args.output, report)
+    else:
+        raise ValueError("Нужен файл отчета или --store и --session")
+    print(json.dumps(report, ensure_ascii=False, indent=4) if args.json else render_report(report))
+    return 0
+
+
+def _add_screening_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--workers", type=int, default=4, help="одновременные запросы скрининга")
+    parser.add_argument("--rps", type=float, default=1.0, help="лимит запросов скрининга в секунду")
+    parser.add_argument("--checkpoint", help="JSONL чекпоинт скрининга для продолжения прерванного запуска")
+    parser.add_argument("--batch-tokens", type=int, help="бюджет токенов пакетного скрининга нескольких CV")
+    parser.add_argument("--prefilter", type=float, help="порог локального отсева CV без LLM")
+    parser.add_argument("--dedup", type=float, help="порог сходства, с которого CV считаются дубликатами (0.8)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="hr-pipeline", description="Скрининг CV, вопросы, интервью и отчет")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    screen = subparsers.add_parser("screen", help="скрининг папки CV по вакансии")
+    screen.add_argument("folder_cv", help="папка с CV")
+    screen.add_argument("vacancy", help="файл с описанием вакансии")
+    screen.add_argument("--output", default="screening_results.json", help="JSON с результатами скрининга")
+    _add_screening_arguments(screen)
+    screen.set_defaults(handler=cmd_screen)
+
+    matrix = subparsers.add_parser("matrix", help="скрининг папки CV сразу по нескольким вакансиям")
+    matrix.add_argument("folder_cv", help="папка с CV")
+    matrix.add_argument("vacancies", nargs="+", help="файлы с описаниями вакансий")
+    matrix.add_argument("--output", default="matrix.json", help="JSON {CV: {вакансия: результат}}")
+    matrix.add_argument("--workers", type=int, default=4, help="CV, обрабатываемые одновременно")
+    matrix.add_argument("--rps", type=float, default=1.0, help="лимит запросов в секунду")
+    matrix.set_defaults(handler=cmd_matrix)
+
+    questions = subparsers.add_parser("questions", help="вопросы для подходящих кандидатов")
+    questions.add_argument("vacancy", help="файл с описанием вакансии")
+    questions.add_argument("--screening", help="JSON результатов screen")
+    questions.add_argument("--folder-cv", help="папка с CV, скрининг выполняется перед генерацией вопросов")
+    questions.add_argument("--output", default="questions.json", help="JSON {CV: вопросы}")
+    questions.add_argument("--no-bank", action="store_true", help="генерировать все вопросы для каждого кандидата")
+    _add_screening_arguments(questions)
+    questions.set_defaults(handler=cmd_questions)
+
+    interview = subparsers.add_parser("interview", help="интервью в консоли")
+    interview.add_argument("--questions", help="JSON вопросов кандидата или результат questions")
+    interview.add_argument("--candidate", help="CV кандидата в файле вопросов")
+    interview.add_argument("--vacancy", default="Ведущий специалист по обслуживанию ЦОД", help="название вакансии")
+    interview.add_argument("--vacancy-file", help="описание вакансии, название берется из него")
+    interview.add_argument("--store", help="SQLite хранилище сессий, интервью можно продолжить")
+    interview.add_argument("--session", help="id сессии, по умолчанию путь к CV кандидата")
+    interview.add_argument("--output", default=".", help="папка для ответов и итогового отчета")
+    interview.set_defaults(handler=cmd_interview)
+
+    report = subparsers.add_parser("report", help="вывод готового отчета или отчет по сессии интервью")
+    report.add_argument("report", nargs="?", help="JSON итогового отчета")
+    report.add_argument("--store", help="SQLite хранилище сессий")
+    report.add_argument("--session", help="id сессии интервью")
+    report.add_argument("--output", help="сохранить построенный отчет в JSON")
+    report.add_argument("--batch", action="store_true", help="оценить все ответы одним запросом")
+    report.add_argument("--json", action="store_true", help="вывести отчет как JSON")
+    report.set_defaults(handler=cmd_report)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (ValueError, KeyError, FileNotFoundError) as e:
+        message = e.args[0] if isinstance(e, KeyError) and e.args else e
+        print(f"[ERROR] {message}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
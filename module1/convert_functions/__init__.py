@@ -1,3 +1,14 @@
+from .extractors import *
 from .convert_functions import *
 from .prompt import *
-from .pydantic_class import *
\ No newline at end of file
+from .pydantic_class import *
+from .rate_limit import *
+from .text_cache import *
+from .extraction import *
+from .llm_cache import *
+from .prefilter import *
+from .dedup import *
+from .checkpoint import *
+from .transport import *
+from .metrics import *
+from .vacancy_profile import *
\ No newline at end of file
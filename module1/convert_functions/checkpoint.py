@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from typing import Iterator, Tuple
+
+
+class JsonlCheckpoint:
+    """
+    Append-only JSONL file with per-cv results, one line {"file": ..., "result": ...} per processed cv.
+    Every line is flushed to disk right away, so after crash all finished cv are kept
+    and can be skipped on restart. Truncated last line after crash is ignored on reading
+    and cut off before the first append, so new records are not glued to it.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path to .jsonl checkpoint
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._repaired = False
+
+    def _repair(self) -> None:
+        """
+        Cuts off unterminated last line left by crash, called once before the first append
+        """
+        self._repaired = True
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+            f.truncate(data.rfind(b"\n") + 1)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def iter_results(self) -> Iterator[Tuple[str, dict]]:
+        """
+        :return: iterator of (file, result) from checkpoint, later records of the same file win when collected to dict
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                yield record["file"], record["result"]
+
+    def done_files(self) -> set:
+        """
+        :return: set of cv with successful result, cv finished with error are processed again
+        """
+        done = set()
+        for file, result in self.iter_results():
+            if "error" in result:
+                done.discard(file)
+            else:
+                done.add(file)
+        return done
+
+    def append(self, file: str, result: dict) -> None:
+        line = json.dumps({"file": file, "result": result}, ensure_ascii=False)
+        with self._lock:
+            if not self._repaired:
+                self._repair()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
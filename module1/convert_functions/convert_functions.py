@@ -1,8 +1,10 @@
-import os.path
-import aspose.words as aw
+import json
+import os
 import re
 from pydantic import BaseModel,create_model
 from typing import Optional
+from .text_cache import TextCache, file_hash
+from .extractors import extract_text
 
 def clean_text(text: str) -> str:
     """
@@ -13,38 +15,50 @@ def clean_text(text: str) -> str:
     text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
-def convert_to_text(file_list: list, file_num: int) -> str:
+
+
+def write_json(path: str, data) -> None:
+    """
+    Function for saving results to JSON, file is replaced atomically so a reader never sees half-written file
+    :param path: output file
+    :param data: JSON serializable data
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def convert_to_text(file_list: list, file_num: int, cache: Optional[TextCache] = None) -> str:
     """
     Function for converting file from list of links use in cycle to use on whole list.
+    Format is selected by extension in extractor registry (extractors.py), Aspose is the fallback.
     :param file_list: list with links to cv
     :param file_num: num of cv in list
+    :param cache: cache of cleaned text by file content hash, extraction is skipped on hit
     :return: text of file_num cv
     """
-    lines_to_remove = [
-        """Created with an evaluation copy of Aspose.Words. To remove all limitations, you can use Free Temporary 
-        License  HYPERLINK "https://products.aspose.com/words/temporary-license/" 
-        https://products.aspose.com/words/temporary-license/""",
-        "Evaluation Only. Created with Aspose.Words. Copyright 2003-2025 Aspose Pty Ltd."
-        ]
     file = file_list[file_num]
-    _, ext = os.path.splitext(file)
-    ext = ext.lower()
-    if ext in [".doc", ".docx", ".rtf", ".pdf"]:
-        try:
-            doc = aw.Document(str(file))
-            text = doc.get_text()
-            text = text.splitlines()
-            filtered_text = [line for line in text if line.strip() not in lines_to_remove]
-            filtered_text = '\n'.join(filtered_text)
-            return clean_text(filtered_text)
-        except Exception as e:
-            raise f"Ошибка при обработке {file}:{e}"
+    digest = None
+    if cache is not None:
+        digest = file_hash(file)
+        cached = cache.get(digest)
+        if cached is not None:
+            return cached
+    try:
+        text = clean_text(extract_text(str(file)))
+    except Exception as e:
+        raise ValueError(f"Ошибка при обработке {file}:{e}")
+    if cache is not None:
+        cache.put(digest, text)
+    return text
 def convert_to_dict(file: str) -> dict:
     """
     Function for converting cv describe to dict with key and values
     :param file: selected path to the cv info
     :return: dictionary formed from table from cv info where first column is key and second if values
     """
+    import aspose.words as aw
     doc = aw.Document(file)
     tables = doc.get_child_nodes(aw.NodeType.TABLE, True)
     if not tables:
@@ -52,6 +66,7 @@ def convert_to_dict(file: str) -> dict:
 
     table = tables[0].as_table()
     result = {}
+    vacancy_name = None
 
     for row in table.rows:
         row = row.as_row()
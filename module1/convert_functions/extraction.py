@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from .convert_functions import convert_to_text
+from .text_cache import TextCache, DEFAULT_MAX_BYTES
+from .metrics import pipeline_metrics
+
+_DONE = object()
+_worker_caches = {}
+
+
+def _extract_one(file: str, cache_dir: Optional[str], cache_max_bytes: int) -> tuple:
+    """
+    Function executed in worker process, cache object is created once per process
+    :return: (file, text, error, seconds)
+    """
+    cache = None
+    if cache_dir is not None:
+        cache = _worker_caches.get(cache_dir)
+        if cache is None:
+            cache = _worker_caches[cache_dir] = TextCache(cache_dir, cache_max_bytes)
+    start = time.perf_counter()
+    try:
+        return file, convert_to_text(file_list=[file], file_num=0, cache=cache), None, time.perf_counter() - start
+    except Exception as e:
+        return file, None, str(e), time.perf_counter() - start
+
+
+def iter_extracted(file_paths: list, max_processes: Optional[int] = None, queue_size: int = 32,
+                   cache: Optional[TextCache] = None,
+                   labels: Optional[dict] = None) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Extraction stage: converts cv in process pool on all cores and yields them through bounded queue
+    in order of completion. Not more than queue_size files are converted ahead of consumer,
+    so parsing of next cv overlaps with LLM calls for previous ones without piling up texts in memory.
+    :param file_paths: list with links to cv
+    :param max_processes: number of worker processes, by default os.cpu_count()
+    :param queue_size: max number of extracted texts waiting for consumer
+    :param cache: cache of cleaned text, shared with workers through its folder
+    :param labels: metric labels, conversion time of every file is recorded as extraction stage
+    :return: iterator of (file, text, error), error is None on success
+    """
+    if queue_size < 1:
+        raise ValueError("queue_size должен быть не меньше 1")
+    cache_dir = cache.cache_dir if cache is not None else None
+    cache_max_bytes = cache.max_bytes if cache is not None else DEFAULT_MAX_BYTES
+
+    results = queue.Queue()
+    slots = threading.Semaphore(queue_size)
+    stop = threading.Event()
+
+    def feeder():
+        try:
+            with ProcessPoolExecutor(max_workers=max_processes or os.cpu_count()) as pool:
+                for file in file_paths:
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    future = pool.submit(_extract_one, file, cache_dir, cache_max_bytes)
+                    future.add_done_callback(
+                        lambda f, file=file: results.put(
+                            f.result() if f.exception() is None else (file, None, str(f.exception()), 0.0)
+                            )
+                        )
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=feeder, name="cv-extraction", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            slots.release()
+            file, text, error, seconds = item
+            pipeline_metrics.record_stage("extraction", seconds, **(labels or {}))
+            yield file, text, error
+    finally:
+        stop.set()
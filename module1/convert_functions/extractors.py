@@ -0,0 +1,207 @@
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterator, Optional
+
+# форматы, которые умеет читать Aspose.Words, он используется для них, если встроенного извлечения нет или оно упало
+ASPOSE_EXTENSIONS = (".doc", ".docx", ".rtf", ".pdf", ".odt", ".html", ".htm", ".txt")
+ASPOSE_WATERMARKS = [
+    """Created with an evaluation copy of Aspose.Words. To remove all limitations, you can use Free Temporary
+    License  HYPERLINK "https://products.aspose.com/words/temporary-license/"
+    https://products.aspose.com/words/temporary-license/""",
+    "Evaluation Only. Created with Aspose.Words. Copyright 2003-2025 Aspose Pty Ltd."
+    ]
+
+_EXTRACTORS: Dict[str, Callable[[str], str]] = {}
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_TEXT = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n", _W + "p": "\n", _W + "tc": " "}
+_DOCX_EXTRA_PARTS = re.compile(r"word/(header|footer)\d*\.xml")
+
+_ODT_TEXT_NS = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_ODT_BLOCKS = {_ODT_TEXT_NS + "p", _ODT_TEXT_NS + "h"}
+
+
+def register_extractor(*extensions: str) -> Callable:
+    """
+    Decorator registering function path -> raw text as extractor of given extensions,
+    registered extractor replaces previous one for the same extension
+    :param extensions: extensions with dot, e.g. ".docx"
+    """
+
+    def decorator(function: Callable[[str], str]) -> Callable[[str], str]:
+        for extension in extensions:
+            _EXTRACTORS[extension.lower()] = function
+        return function
+
+    return decorator
+
+
+def get_extractor(extension: str) -> Optional[Callable[[str], str]]:
+    """
+    :param extension: extension with dot
+    :return: registered extractor or None, then only Aspose fallback is used
+    """
+    return _EXTRACTORS.get(extension.lower())
+
+
+def _iter_docx_part(stream) -> Iterator[str]:
+    # документ читается потоково: абзац очищается сразу после обработки, дерево целиком в памяти не строится
+    for _, element in ET.iterparse(stream, events=("end",)):
+        if element.tag == _W + "t":
+            yield element.text or ""
+        elif element.tag in _DOCX_TEXT:
+            yield _DOCX_TEXT[element.tag]
+            if element.tag == _W + "p":
+                element.clear()
+
+
+@register_extractor(".docx")
+def extract_docx(path: str) -> str:
+    """
+    Function for extracting text from .docx with zipfile and xml parser of standard library.
+    Text of body, headers and footers is taken, field codes and deleted revisions are skipped
+    :param path: path to .docx
+    :return: raw text, paragraphs are separated by new line
+    """
+    with zipfile.ZipFile(path) as docx:
+        parts = ["word/document.xml"] + sorted(name for name in docx.namelist() if _DOCX_EXTRA_PARTS.fullmatch(name))
+        chunks = []
+        for part in parts:
+            with docx.open(part) as stream:
+                chunks.extend(_iter_docx_part(stream))
+    return "".join(chunks)
+
+
+def _odt_text(element: ET.Element, chunks: list) -> None:
+    if element.text:
+        chunks.append(element.text)
+    for child in element:
+        if child.tag == _ODT_TEXT_NS + "s":
+            chunks.append(" " * int(child.get(_ODT_TEXT_NS + "c", "1")))
+        elif child.tag == _ODT_TEXT_NS + "tab":
+            chunks.append("\t")
+        elif child.tag == _ODT_TEXT_NS + "line-break":
+            chunks.append("\n")
+        else:
+            _odt_text(child, chunks)
+        if child.tail:
+            chunks.append(child.tail)
+    if element.tag in _ODT_BLOCKS:
+        chunks.append("\n")
+
+
+@register_extractor(".odt")
+def extract_odt(path: str) -> str:
+    """
+    Function for extracting text from OpenDocument text (content.xml inside zip)
+    :param path: path to .odt
+    :return: raw text
+    """
+    with zipfile.ZipFile(path) as odt:
+        with odt.open("content.xml") as stream:
+            root = ET.parse(stream).getroot()
+    chunks = []
+    _odt_text(root, chunks)
+    return "".join(chunks)
+
+
+def _decode(data: bytes) -> str:
+    for encoding in ("utf-8-sig", "cp1251"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace")
+
+
+@register_extractor(".txt")
+def extract_txt(path: str) -> str:
+    """
+    Function for reading plain text, utf-8 or cp1251
+    :param path: path to .txt
+    :return: raw text
+    """
+    with open(path, "rb") as f:
+        return _decode(f.read())
+
+
+class _HTMLText(HTMLParser):
+    SKIP = {"script", "style", "head", "noscript", "template"}
+    BLOCKS = {"p", "div", "br", "li", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article",
+              "table", "ul", "ol", "header", "footer"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCKS:
+            self.chunks.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.BLOCKS:
+            self.chunks.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.chunks.append(data)
+
+
+@register_extractor(".html", ".htm")
+def extract_html(path: str) -> str:
+    """
+    Function for extracting visible text from html, scripts and styles are skipped
+    :param path: path to .html
+    :return: raw text
+    """
+    with open(path, "rb") as f:
+        parser = _HTMLText()
+        parser.feed(_decode(f.read()))
+        parser.close()
+    return "".join(parser.chunks)
+
+
+def extract_with_aspose(path: str) -> str:
+    """
+    Fallback extractor through Aspose.Words, library is imported on first use, evaluation watermarks are removed
+    :param path: path to document
+    :return: raw text
+    """
+    import aspose.words as aw
+    text = aw.Document(str(path)).get_text()
+    return "\n".join(line for line in text.splitlines() if line.strip() not in ASPOSE_WATERMARKS)
+
+
+def extract_text(path: str) -> str:
+    """
+    Function for extracting raw text of document by extension: registered extractor first,
+    Aspose if there is no extractor for format or it failed (e.g. .doc renamed to .docx)
+    :param path: path to document
+    :return: raw text
+    """
+    extension = os.path.splitext(path)[1].lower()
+    extractor = get_extractor(extension)
+    native_error = None
+    if extractor is not None:
+        try:
+            return extractor(path)
+        except Exception as e:
+            if extension not in ASPOSE_EXTENSIONS:
+                raise
+            native_error = e
+    if extension not in ASPOSE_EXTENSIONS:
+        raise ValueError(f"Неподдерживаемый формат файла: {path}")
+    try:
+        return extract_with_aspose(path)
+    except ImportError:
+        if native_error is not None:
+            raise native_error
+        raise
@@ -0,0 +1,258 @@
+"""
+Local OpenAI-compatible stub of /v1/chat/completions for tests and benchmarks, works without network and API quota.
+Answers are generated from response_format json schema or forced tool parameters, latency and error rate are configurable.
+With "stream": true answer is sent as server-sent events chunk by chunk (content by words, tool arguments by pieces).
+Run: python -m module1.convert_functions.fake_server --port 8000 --latency 0.5 --error-rate 0.05
+and set LLM_BASE_URL=http://127.0.0.1:8000/v1
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+def sample_from_schema(schema: dict, root: Optional[dict] = None):
+    """
+    Function for building minimal valid value for json schema
+    :param schema: json schema
+    :param root: root schema for resolving $ref
+    :return: value matching schema
+    """
+    root = root or schema
+    if "$ref" in schema:
+        node = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            node = node[part]
+        return sample_from_schema(node, root)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return sample_from_schema(options[0], root)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+    if schema_type == "object":
+        return {name: sample_from_schema(prop, root) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "array":
+        return [sample_from_schema(schema.get("items") or {"type": "string"}, root)]
+    if schema_type == "string":
+        return "Тестовый ответ"
+    if schema_type == "integer":
+        return int(schema.get("minimum", 1))
+    if schema_type == "number":
+        return float(schema.get("minimum", 5))
+    if schema_type == "boolean":
+        return True
+    return None
+
+
+def default_responder(body: dict) -> dict:
+    """
+    Builds assistant message for request: tool call for forced tool, json for response_format, text otherwise
+    :param body: request body
+    :return: message dict
+    """
+    tools = body.get("tools") or []
+    if tools:
+        tool_choice = body.get("tool_choice")
+        name = tool_choice["function"]["name"] if isinstance(tool_choice, dict) else tools[0]["function"]["name"]
+        function = next(tool["function"] for tool in tools if tool["function"]["name"] == name)
+        arguments = sample_from_schema(function.get("parameters", {}))
+        return {"role": "assistant", "content": None, "tool_calls": [{
+            "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+            }]}
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        content = sample_from_schema(response_format["json_schema"]["schema"])
+        return {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)}
+    return {"role": "assistant", "content": "Тестовый ответ модели."}
+
+
+class FakeLLMServer:
+    """
+    Threaded stub server, use as context manager:
+    with FakeLLMServer(latency=0.2) as server: LLMTransport(base_url=server.url, api_key="test")
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: Optional[float] = None,
+                 responder: Callable[[dict], dict] = default_responder, seed: Optional[int] = None,
+                 token_interval: float = 0.0):
+        """
+        :param host: host to bind
+        :param port: port to bind, 0 - any free port
+        :param latency: delay before every answer in seconds
+        :param error_rate: share of requests answered with error_status
+        :param error_status: HTTP status of injected errors (429, 500, 503 ...)
+        :param retry_after: Retry-After header value for injected errors
+        :param responder: function building assistant message from request body
+        :param seed: seed for error injection
+        :param token_interval: delay between streamed chunks in seconds
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.responder = responder
+        self.token_interval = token_interval
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, chunks: list):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                events = [f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n" for chunk in chunks]
+                for event in events + ["data: [DONE]\n\n"]:
+                    data = event.encode("utf-8")
+                    self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+                    if server.token_interval:
+                        time.sleep(server.token_interval)
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                with server._lock:
+                    server.requests += 1
+                    failed = server._random.random() < server.error_rate
+                    if failed:
+                        server.errors += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if failed:
+                    headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else None
+                    self._send_json(server.error_status, {"error": {"message": "Injected error",
+                                                                    "code": server.error_status}}, headers)
+                    return
+                if body.get("stream"):
+                    self._send_stream(server.build_chunks(body))
+                else:
+                    self._send_json(200, server.build_completion(body))
+
+        return Handler
+
+    @staticmethod
+    def _usage(body: dict, message: dict) -> dict:
+        prompt_tokens = len(json.dumps(body.get("messages", []), ensure_ascii=False)) // 3
+        completion_text = message.get("content") or json.dumps(message.get("tool_calls"), ensure_ascii=False)
+        completion_tokens = len(completion_text) // 3
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    def build_completion(self, body: dict) -> dict:
+        message = self.responder(body)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+            "usage": self._usage(body, message),
+            }
+
+    def build_chunks(self, body: dict, piece_size: int = 8) -> list:
+        """
+        Splits answer into chat.completion.chunk objects: content by words, tool call arguments by piece_size chars
+        Usage is sent in separate last chunk if stream_options.include_usage is set
+        """
+        message = self.responder(body)
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "fake")}
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+            return {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        chunks = [chunk({"role": "assistant", "content": ""})]
+        for token in re.findall(r"\s*\S+", message.get("content") or ""):
+            chunks.append(chunk({"content": token}))
+        for index, tool_call in enumerate(message.get("tool_calls") or []):
+            function = tool_call["function"]
+            chunks.append(chunk({"tool_calls": [{"index": index, "id": tool_call["id"], "type": "function",
+                                                 "function": {"name": function["name"], "arguments": ""}}]}))
+            arguments = function["arguments"]
+            for start in range(0, len(arguments), piece_size):
+                chunks.append(chunk({"tool_calls": [{"index": index,
+                                                     "function": {"arguments": arguments[start:start + piece_size]}}]}))
+        chunks.append(chunk({}, "tool_calls" if message.get("tool_calls") else "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({**base, "choices": [], "usage": self._usage(body, message)})
+        return chunks
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Локальная заглушка OpenAI-совместимого API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    args = parser.parse_args()
+    fake = FakeLLMServer(args.host, args.port, args.latency, args.error_rate, args.error_status, args.retry_after,
+                         token_interval=args.token_interval)
+    print(f"Заглушка LLM запущена: {fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from .metrics import pipeline_metrics
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 20000
+
+
+class LLMCache:
+    """
+    Local SQLite cache of LLM responses for deterministic calls (fixed model, prompt and sampling params).
+    Key is built from model, messages, sampling params and response schema or tool definition,
+    so any change in prompt or schema is a miss. Entries expire after ttl_seconds, when there are
+    more than max_entries the least recently used are removed.
+    bypass=True skips lookups but still stores fresh responses, i.e. refreshes the cache.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, bypass: bool = False):
+        """
+        :param path: path to sqlite file, by default LLM_CACHE_PATH env or .cache/llm_responses.sqlite3
+        :param ttl_seconds: lifetime of entry
+        :param max_entries: max number of entries before LRU eviction
+        :param bypass: do not read from cache, only write
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, value TEXT, created REAL, accessed REAL)"
+            )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(kind: str, **request: Any) -> str:
+        """
+        :param kind: type of call (parse, tool, content), responses of different kinds are not mixed
+        :param request: kwargs of chat.completions call
+        :return: sha256 of normalized request
+        """
+        normalized = dict(request)
+        response_format = normalized.get("response_format")
+        if hasattr(response_format, "model_json_schema"):
+            normalized["response_format"] = response_format.model_json_schema()
+        payload = json.dumps({"kind": kind, **normalized}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            if self.bypass:
+                self.misses += 1
+                return None
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str, model: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, value, now, now)
+                )
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,)
+                    )
+            self._conn.commit()
+
+    def invalidate(self, key: Optional[str] = None, model: Optional[str] = None) -> int:
+        """
+        Remove entries: one key, all entries of model, or whole cache if nothing is passed
+        :return: number of removed entries
+        """
+        with self._lock:
+            if key is not None:
+                cursor = self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            elif model is not None:
+                cursor = self._conn.execute("DELETE FROM responses WHERE model = ?", (model,))
+            else:
+                cursor = self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_llm_cache() -> Optional[LLMCache]:
+    """
+    Shared cache for all modules, configured by env:
+    LLM_CACHE=off disables cache, LLM_CACHE_BYPASS=1 only refreshes entries,
+    LLM_CACHE_INVALIDATE=1 clears cache on first use, LLM_CACHE_TTL sets ttl in seconds.
+    :return: LLMCache or None if disabled
+    """
+    global _default_cache
+    if os.getenv("LLM_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                bypass=os.getenv("LLM_CACHE_BYPASS", "0").lower() in ("1", "true", "on")
+                )
+            if os.getenv("LLM_CACHE_INVALIDATE", "0").lower() in ("1", "true", "on"):
+                _default_cache.invalidate()
+        return _default_cache
+
+
+def parse_cached(client, cache: Optional[LLMCache], labels: Optional[dict] = None, **request: Any):
+    """
+    client.chat.completions.parse through cache, llm_call/parse time and response.usage go to pipeline_metrics.
+    For parse() schema validation happens inside SDK call and is counted in llm_call.
+    :param labels: metric labels (module, vacancy)
+    :return: parsed response_format object
+    """
+    labels = labels or {}
+    model = request.get("model")
+    response_format = request["response_format"]
+    key = cache.make_key("parse", **request) if cache is not None else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            with pipeline_metrics.stage("parse", **labels):
+                parsed = response_format.model_validate_json(hit)
+            pipeline_metrics.record_usage(model, cache_hit=True, **labels)
+            return parsed
+    with pipeline_metrics.stage("llm_call", **labels):
+        response = client.chat.completions.parse(**request)
+    pipeline_metrics.record_usage(model, response.usage, **labels)
+    with pipeline_metrics.stage("parse", **labels):
+        parsed = response.choices[0].message.parsed
+    if cache is not None:
+        cache.put(key, parsed.model_dump_json(), model=model)
+    return parsed
+
+
+def tool_call_cached(client, cache: Optional[LLMCache], labels: Optional[dict] = None, **request: Any) -> dict:
+    """
+    client.chat.completions.create with forced tool call through cache
+    :param labels: metric labels (module, vacancy)
+    :return: arguments of first tool call
+    """
+    labels = labels or {}
+    model = request.get("model")
+    key = cache.make_key("tool", **request) if cache is not None else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            with pipeline_metrics.stage("parse", **labels):
+                tool_args = json.loads(hit)
+            pipeline_metrics.record_usage(model, cache_hit=True, **labels)
+            return tool_args
+    with pipeline_metrics.stage("llm_call", **labels):
+        response = client.chat.completions.create(**request)
+    pipeline_metrics.record_usage(model, response.usage, **labels)
+    with pipeline_metrics.stage("parse", **labels):
+        arguments = response.choices[0].message.tool_calls[0].function.arguments
+        tool_args = json.loads(arguments)
+    if cache is not None:
+        cache.put(key, arguments, model=model)
+    return tool_args
+
+
+def content_cached(client, cache: Optional[LLMCache], labels: Optional[dict] = None, **request: Any) -> str:
+    """
+    client.chat.completions.create through cache
+    :param labels: metric labels (module, vacancy)
+    :return: message content
+    """
+    labels = labels or {}
+    model = request.get("model")
+    key = cache.make_key("content", **request) if cache is not None else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            pipeline_metrics.record_usage(model, cache_hit=True, **labels)
+            return hit
+    with pipeline_metrics.stage("llm_call", **labels):
+        response = client.chat.completions.create(**request)
+    pipeline_metrics.record_usage(model, response.usage, **labels)
+    content = response.choices[0].message.content
+    if cache is not None and content is not None:
+        cache.put(key, content, model=model)
+    return content
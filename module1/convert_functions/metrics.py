@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+STAGES = ("extraction", "prompt_build", "llm_call", "parse", "turn", "first_token")
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = []
+    for name, value in key:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metrics:
+    """
+    Registry of per-stage wall time and token usage of LLM calls for all modules.
+    Stages: extraction, prompt_build, llm_call, parse, turn (whole interview turn, labeled by tier),
+    first_token (time to first streamed token of interviewer message). Labels module/vacancy/model allow per-vacancy totals.
+    Every event is also appended as JSON line to log_path (METRICS_LOG_PATH env) if it is set,
+    totals are exported in Prometheus text format to file or small HTTP endpoint.
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        """
+        :param log_path: JSONL file for structured events, by default METRICS_LOG_PATH env
+        """
+        self.log_path = log_path or os.getenv("METRICS_LOG_PATH")
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stage_seconds = {}
+            self._stage_calls = {}
+            self._tokens = {}
+            self._llm_calls = {}
+
+    def _log(self, event: dict) -> None:
+        if not self.log_path:
+            return
+        event = {"ts": round(time.time(), 3), **event}
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def record_stage(self, stage: str, seconds: float, **labels) -> None:
+        key = _label_key({"stage": stage, **labels})
+        with self._lock:
+            self._stage_seconds[key] = self._stage_seconds.get(key, 0.0) + seconds
+            self._stage_calls[key] = self._stage_calls.get(key, 0) + 1
+        self._log({"event": "stage", "stage": stage, "seconds": round(seconds, 6), **labels})
+
+    @contextmanager
+    def stage(self, stage: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start, **labels)
+
+    def record_usage(self, model: Optional[str], usage=None, cache_hit: bool = False, **labels) -> None:
+        """
+        :param model: model name
+        :param usage: response.usage of OpenAI response, None for cache hits
+        :param cache_hit: response was taken from LLM cache
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        call_key = _label_key({"model": model, "cache": "hit" if cache_hit else "miss", **labels})
+        with self._lock:
+            self._llm_calls[call_key] = self._llm_calls.get(call_key, 0) + 1
+            for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+                key = _label_key({"model": model, "kind": kind, **labels})
+                self._tokens[key] = self._tokens.get(key, 0) + count
+        self._log({"event": "llm_usage", "model": model, "cache_hit": cache_hit, "prompt_tokens": prompt_tokens,
+                   "completion_tokens": completion_tokens, **labels})
+
+    def totals(self, **labels) -> dict:
+        """
+        Totals over all series matching labels, e.g. totals(vacancy="...") for one vacancy
+        :return: dict {stages: {stage: {calls, seconds}}, llm_calls, cache_hits, prompt_tokens, completion_tokens}
+        """
+        wanted = set(_label_key(labels))
+        result = {"stages": {}, "llm_calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        with self._lock:
+            for key, seconds in self._stage_seconds.items():
+                if wanted <= set(key):
+                    stage = dict(key)["stage"]
+                    totals = result["stages"].setdefault(stage, {"calls": 0, "seconds": 0.0})
+                    totals["calls"] += self._stage_calls[key]
+                    totals["seconds"] = round(totals["seconds"] + seconds, 6)
+            for key, count in self._llm_calls.items():
+                if wanted <= set(key):
+                    result["llm_calls"] += count
+                    if dict(key)["cache"] == "hit":
+                        result["cache_hits"] += count
+            for key, count in self._tokens.items():
+                if wanted <= set(key):
+                    result[f"{dict(key)['kind']}_tokens"] += count
+        result["total_tokens"] = result["prompt_tokens"] + result["completion_tokens"]
+        return result
+
+    def report(self, **labels) -> dict:
+        """
+        Totals for labels, also written to JSON log as totals event
+        """
+        totals = self.totals(**labels)
+        self._log({"event": "totals", **labels, **totals})
+        return totals
+
+    def report_totals(self, title: str, **labels) -> dict:
+        """
+        Totals for labels printed at the end of a module run, Prometheus file is refreshed (write_prometheus)
+        :param title: what totals are for, e.g. "вакансии 'name'"
+        """
+        totals = self.report(**labels)
+        print(f"[INFO] Итоги по {title}: {json.dumps(totals, ensure_ascii=False)}")
+        self.write_prometheus()
+        return totals
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            series = (
+                ("hr_stage_seconds_total", "Wall time of pipeline stage", self._stage_seconds),
+                ("hr_stage_calls_total", "Number of executions of pipeline stage", self._stage_calls),
+                ("hr_llm_calls_total", "Number of LLM calls by cache hit/miss", self._llm_calls),
+                ("hr_llm_tokens_total", "Tokens from response.usage", self._tokens),
+                )
+            for name, description, values in series:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        :param path: output file, by default METRICS_PROM_PATH env, nothing is written if both are empty
+        :return: path of written file
+        """
+        path = path or os.getenv("METRICS_PROM_PATH")
+        if not path:
+            return None
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def serve_prometheus(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Starts background HTTP endpoint with metrics in Prometheus text format
+        :return: server, call shutdown() to stop
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                data = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        return server
+
+
+pipeline_metrics = Metrics()
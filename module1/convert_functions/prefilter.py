@@ -0,0 +1,157 @@
+import re
+from datetime import date
+from typing import Optional
+
+# ключи таблицы вакансии, из значений которых берутся требования
+REQUIREMENT_KEY_MARKERS = ("требован", "навык", "опыт", "образован", "обязанност", "знани", "умени", "компетенц")
+EXPERIENCE_KEY_MARKERS = ("опыт",)
+STOP_WORDS = {
+    "для", "или", "при", "как", "что", "это", "так", "его", "она", "они", "также", "если", "над", "под", "без",
+    "from", "the", "and", "with", "работы", "работа", "опыт", "знание", "знания", "умение", "навыки", "наличие",
+    "желательно", "обязательно", "уровне", "уровень", "лет", "года", "год", "менее", "более", "области",
+    }
+
+_WORD_RE = re.compile(r"[a-zа-я0-9+#]{3,}")
+# "от 3 лет", "3+ года", "3-х лет", для диапазона "3-5 лет" и "от 3 до 5 лет" берется нижняя граница
+_REQUIRED_YEARS_RE = re.compile(r"(\d+)(?:\s*(?:[-–—]|до)\s*\d+)?\s*(?:-?х\s*)?(?:\+\s*)?(?:лет|год)")
+_YEAR_RANGE_RE = re.compile(
+    r"\b((?:19|20)\d{2})\s*[-–—]\s*((?:19|20)\d{2}|по\s+н\.?\s*в\.?|н\.?\s*в\.?|настоящее|сейчас|текущее)"
+    )
+# разделы резюме: годы под образованием и курсами не являются стажем,
+# "высшее образование" в кратком описании заголовком раздела не считается
+_SECTION_RE = re.compile(
+    r"(?<!высшее )(?<!среднее )(?<!техническое )(?<!профильное )"
+    r"\b(?P<education>образование|обучение|курсы|повышение квалификации|сертификаты|сертификация)\b"
+    r"|\b(?P<experience>опыт работы|трудовая деятельность|места работы|профессиональный опыт)\b"
+    )
+
+
+def _stem(word: str) -> str:
+    # грубый стемминг: общий префикс сводит вместе словоформы русских слов
+    return word[:6] if len(word) > 6 else word
+
+
+def _normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+def _stems(text: str) -> set:
+    return {_stem(word) for word in _WORD_RE.findall(_normalize(text)) if word not in STOP_WORDS}
+
+
+def _cv_years(cv_text: str) -> Optional[float]:
+    """
+    Experience years from year ranges of cv: ranges under education headings are skipped,
+    overlapping ranges (parallel jobs) are merged before summing
+    """
+    text = _normalize(cv_text)
+    current_year = date.today().year
+    sections = [(match.start(), match.lastgroup) for match in _SECTION_RE.finditer(text)]
+    intervals = []
+    for match in _YEAR_RANGE_RE.finditer(text):
+        section = None
+        for position, name in sections:
+            if position > match.start():
+                break
+            section = name
+        if section == "education":
+            continue
+        start, end = int(match.group(1)), match.group(2)
+        end_year = int(end) if end.isdigit() else current_year
+        if end_year >= start:
+            intervals.append((start, end_year))
+    total = 0
+    merged_start, merged_end = None, None
+    for start, end in sorted(intervals):
+        if merged_end is not None and start <= merged_end:
+            merged_end = max(merged_end, end)
+            continue
+        if merged_end is not None:
+            total += merged_end - merged_start
+        merged_start, merged_end = start, end
+    if merged_end is not None:
+        total += merged_end - merged_start
+    return float(total) if total else None
+
+
+class RequirementFilter:
+    """
+    Local matcher compiled once from vacancy dict (convert_to_dict), scores cv text without LLM.
+    Score is share of requirement keywords found in cv, lowered for shortage of experience years
+    when both vacancy and cv have them. CV below reject_threshold are rejected locally,
+    the rest go to LLM.
+    """
+
+    def __init__(self, info_dict: dict, reject_threshold: float = 0.15):
+        """
+        :param info_dict: vacancy dict from convert_to_dict
+        :param reject_threshold: cv with score below it are rejected without LLM
+        """
+        self.reject_threshold = reject_threshold
+        requirement_values = [value for key, value in info_dict.items()
+                              if any(marker in _normalize(key) for marker in REQUIREMENT_KEY_MARKERS)]
+        if not requirement_values:
+            requirement_values = [value for key, value in info_dict.items() if key != "Название"]
+        # стем -> исходное слово вакансии, чтобы в комментарии были читаемые требования
+        self._keyword_words = {}
+        for word in _WORD_RE.findall(_normalize(" ".join(requirement_values))):
+            if word not in STOP_WORDS:
+                self._keyword_words.setdefault(_stem(word), word)
+        self.keywords = set(self._keyword_words)
+
+        self.required_years = None
+        for key, value in info_dict.items():
+            if any(marker in _normalize(key) for marker in EXPERIENCE_KEY_MARKERS):
+                match = _REQUIRED_YEARS_RE.search(_normalize(value))
+                if match:
+                    self.required_years = float(match.group(1))
+                    break
+
+    def score(self, cv_text: Optional[str]) -> dict:
+        """
+        :param cv_text: cleaned cv text
+        :return: dict {score, matched, missing, cv_years}
+        """
+        if not cv_text:
+            return {"score": 0.0, "matched": [], "missing": sorted(self.keywords), "cv_years": None}
+        cv_stems = _stems(cv_text)
+        matched = self.keywords & cv_stems
+        coverage = len(matched) / len(self.keywords) if self.keywords else 1.0
+        cv_years = _cv_years(cv_text)
+        score = coverage
+        if self.required_years and cv_years is not None:
+            score = coverage * (0.7 + 0.3 * min(1.0, cv_years / self.required_years))
+        return {
+            "score": round(score, 3),
+            "matched": sorted(matched),
+            "missing": sorted(self.keywords - matched),
+            "cv_years": cv_years,
+            }
+
+    def check(self, cv_text: Optional[str]) -> tuple:
+        """
+        :param cv_text: cleaned cv text
+        :return: (score, result dict in cv_validation format if cv is rejected locally else None - cv goes to LLM)
+        """
+        scored = self.score(cv_text)
+        if scored["score"] >= self.reject_threshold:
+            return scored["score"], None
+        if not cv_text:
+            comment = "Автоматический отказ без проверки моделью: не удалось извлечь текст резюме."
+        else:
+            comment = (f"Автоматический отказ без проверки моделью: совпадение с требованиями вакансии "
+                       f"{scored['score']:.0%} при пороге {self.reject_threshold:.0%}.")
+            if scored["missing"]:
+                missing = [self._keyword_words[stem] for stem in scored["missing"][:10]]
+                comment += f" Не найдены ключевые требования: {', '.join(missing)}."
+            if self.required_years and scored["cv_years"] is not None and scored["cv_years"] < self.required_years:
+                comment += f" Опыт по резюме около {scored['cv_years']:.0f} лет при требовании {self.required_years:.0f}."
+        return scored["score"], {
+            "comment": comment,
+            "name": None,
+            "experience": [],
+            "contact_data": None,
+            "answer": False,
+            "screening_path": "prefilter",
+            "prefilter_score": scored["score"],
+            }
@@ -1,8 +1,4 @@
-def prompt_info_fill(info: dict,cv_text: str) -> list:
-    return [
-        {
-            "role": 'system',
-            "content": """Ты профессиональный HR рекрутер, тебе нужно дать ответ, почему человек подходит или 
+SCREENING_SYSTEM_PROMPT = """Ты профессиональный HR рекрутер, тебе нужно дать ответ, почему человек подходит или 
             наоборот не подходит.
             Ты должен дать комментарий на свой ответ.
             В первую очередь ты должен определить важность, того или иного критерия, например образование, если у человека образование выше, чем требуется, это не повод для отказа,
@@ -14,6 +10,37 @@ def prompt_info_fill(info: dict,cv_text: str) -> list:
             В contact_data пиши значения, который найдешь для связи, почта, номер телефона или мессенджеры. Если нет, то вместо списка верни null.
             В experienct коротко перечисли где кандидат работал и должность"""
 
+PROFILE_SYSTEM_PROMPT = """Ты профессиональный HR рекрутер, тебе нужно составить краткий профиль кандидата по резюме.
+            Профиль будет сравниваться с разными вакансиями, поэтому не оценивай кандидата, только извлекай факты.
+            В поле name впиши имя, которое найдешь в информации о кандидате, если его нет, то верни null.
+            В contact_data пиши значения, который найдешь для связи, почта, номер телефона или мессенджеры. Если нет, то вместо списка верни null.
+            В experience коротко перечисли где кандидат работал, должность и годы.
+            В skills перечисли навыки, инструменты и технологии, в education уровень и специальность образования."""
+
+MATCH_SYSTEM_PROMPT = """Ты профессиональный HR рекрутер, по профилю кандидата тебе нужно дать ответ, почему человек подходит или 
+            наоборот не подходит на вакансию.
+            Ты должен дать комментарий на свой ответ.
+            В первую очередь ты должен определить важность, того или иного критерия, например образование, если у человека образование выше, чем требуется, это не повод для отказа,
+            а если ниже, то стоит рассмотреть опыт работы.
+            Если опыт работы смежен с тем, что есть в вакансии, но не является релевантным напрямую то это не подходит.
+            К примеру если человек работал в этой сфере но использовал другой инструмент, это не значит, что он не подходит.
+            В "answer" впиши только ответ True или False."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for russian text without tokenizer, used for batch sizing
+    :param text: any text
+    :return: estimated number of tokens
+    """
+    return len(text) // 3 + 1
+
+
+def prompt_info_fill(info: dict,cv_text: str) -> list:
+    return [
+        {
+            "role": 'system',
+            "content": SCREENING_SYSTEM_PROMPT
             },
         {
             "role": "user",
@@ -37,4 +64,83 @@ def prompt_question_block(info: dict,cv_text:str) -> list:
             "content": f"Информация о кандидате:{cv_text}"
                        f"Информация о вакансии:{info}"
             }
-        ]
\ No newline at end of file
+        ]
+
+
+def prompt_info_fill_batch(info: dict, cv_texts: list) -> list:
+    """
+    Prompt for screening several cv in one request, vacancy is sent once
+    :param info: VacancyProfile (or vacancy dict), embedded as its compact prompt fragment
+    :param cv_texts: list of cv texts, candidate number in prompt is index + 1
+    :return: messages
+    """
+    candidates = "\n\n".join(f"[Кандидат {i + 1}]\n{cv_text}" for i, cv_text in enumerate(cv_texts))
+    return [
+        {
+            "role": 'system',
+            "content": SCREENING_SYSTEM_PROMPT + """
+            Тебе передано несколько кандидатов, каждый помечен номером. Оцени каждого независимо от остальных.
+            В results верни ровно по одному элементу на каждого кандидата, в cv_id впиши его номер."""
+            },
+        {
+            "role": "user",
+            "content": f"Информация о вакансии:{info}"
+                       f"Кандидаты:\n{candidates}"
+            }
+    ]
+
+
+def prompt_cv_profile(cv_text: str) -> list:
+    """
+    Prompt for structured profile of candidate, independent of vacancy
+    :param cv_text: cleaned cv text
+    :return: messages
+    """
+    return [
+        {
+            "role": 'system',
+            "content": PROFILE_SYSTEM_PROMPT
+            },
+        {
+            "role": "user",
+            "content": f"Информация о кандидате:{cv_text}"
+            }
+    ]
+
+
+def render_cv_profile(profile) -> str:
+    """
+    Compact text of CvProfile for match prompts, rendered once per cv and sent with every vacancy
+    :param profile: CvProfile
+    :return: prompt fragment
+    """
+    lines = [f"Опыт: {'; '.join(map(str, profile.experience)) or 'не указан'}"]
+    if profile.experience_years is not None:
+        lines.append(f"Стаж, лет: {profile.experience_years:g}")
+    if profile.skills:
+        lines.append(f"Навыки: {', '.join(profile.skills)}")
+    if profile.education:
+        lines.append(f"Образование: {profile.education}")
+    if profile.summary:
+        lines.append(f"Кратко: {profile.summary}")
+    return "\n".join(lines)
+
+
+def prompt_profile_match(info, profile_text: str) -> list:
+    """
+    Small prompt matching ready candidate profile with one vacancy
+    :param info: VacancyProfile (or vacancy dict), embedded as its compact prompt fragment
+    :param profile_text: candidate profile from render_cv_profile
+    :return: messages
+    """
+    return [
+        {
+            "role": 'system',
+            "content": MATCH_SYSTEM_PROMPT
+            },
+        {
+            "role": "user",
+            "content": f"Профиль кандидата:\n{profile_text}\n"
+                       f"Информация о вакансии:\n{info}"
+            }
+    ]
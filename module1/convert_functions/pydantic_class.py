@@ -25,6 +25,63 @@ class Analysis(BaseModel):
         )
 
 
+class BatchAnalysisItem(Analysis):
+    cv_id: int = Field(
+        description="Номер кандидата из запроса."
+        )
+
+
+class BatchAnalysis(BaseModel):
+    results: List[BatchAnalysisItem] = Field(
+        description="Результат проверки для каждого кандидата из запроса."
+        )
+
+
+class CvProfile(BaseModel):
+    name: Optional[str] = Field(
+        description="Имя кандидата из резюме. Null, если не найдено."
+        )
+    contact_data: Optional[list] = Field(
+        description="Контакты для связи. Null, если не найдено."
+        )
+    experience: list = Field(
+        description="Места работы: годы, должность и компания, по одной короткой строке на место."
+        )
+    experience_years: Optional[float] = Field(
+        description="Общий стаж работы в годах. Null, если по резюме не определить."
+        )
+    skills: List[str] = Field(
+        description="Профессиональные навыки, инструменты и технологии из резюме."
+        )
+    education: Optional[str] = Field(
+        description="Образование: уровень и специальность. Null, если не указано."
+        )
+    summary: str = Field(
+        description="Краткое описание кандидата в 2-3 предложениях."
+        )
+
+
+class VacancyMatch(BaseModel):
+    comment: str = Field(
+        description="Обоснование, почему кандидат подходит или нет, основанное на сравнении профиля и вакансии."
+        )
+    answer: bool = Field(
+        description="Подходит для работы да или нет. True or False"
+        )
+
+
+class CandidateProfile(BaseModel):
+    file: str = Field(
+        description="Путь к CV."
+        )
+    analysis: Analysis = Field(
+        description="Результат скрининга CV."
+        )
+    cv_text: str = Field(
+        description="Очищенный текст CV, извлеченный на этапе скрининга."
+        )
+
+
 class CvValidationResult(BaseModel):
     analysis: Analysis = Field(
         description="Блок, содержащий рассуждения и извлеченные данные."
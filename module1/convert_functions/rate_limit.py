@@ -0,0 +1,57 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often requests are sent to the LLM provider.
+    Replaces fixed time.sleep() pauses: idle time is accumulated as tokens (up to capacity),
+    so short bursts go out immediately and the long-run rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        :param rate: tokens added per second (requests per second)
+        :param capacity: max tokens stored, i.e. allowed burst size
+        """
+        if rate <= 0:
+            raise ValueError("rate должен быть больше 0")
+        if capacity < 1:
+            raise ValueError("capacity должен быть не меньше 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens without waiting
+        :param tokens: number of tokens to take
+        :return: True if tokens were taken
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Block until tokens are available and take them
+        :param tokens: number of tokens to take
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import threading
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "cv_text")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Function for hashing file content, used as cache key so renamed or copied cv hit the same entry
+    :param path: path to file
+    :param chunk_size: size of chunk read from disk
+    :return: sha256 hex digest of file content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """
+    Persistent content-addressed cache of cleaned cv text.
+    One file per entry named by content hash, last access is kept in file mtime,
+    when total size exceeds max_bytes the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: folder for cache, by default CV_TEXT_CACHE_DIR env or .cache/cv_text
+        :param max_bytes: size cap of cache folder in bytes
+        """
+        self.cache_dir = cache_dir or os.getenv("CV_TEXT_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.txt")
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        :param digest: content hash from file_hash
+        :return: cached text or None
+        """
+        path = self._path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return text
+
+    def put(self, digest: str, text: str) -> None:
+        """
+        :param digest: content hash from file_hash
+        :param text: cleaned text of cv
+        """
+        path = self._path(digest)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = text.encode("utf-8")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._size = 0
@@ -0,0 +1,315 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+RETRY_STATUS_CODES = {408, 409, 429}
+DEFAULT_MODEL_CONCURRENCY = 4
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a model after failure_threshold retryable failures in a row.
+    After reset_timeout one trial request is let through (half-open), success closes the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("Модель временно недоступна, запросы приостановлены")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """
+        Frees half-open trial slot without changing state, for requests failed on client side (400, 401, 422)
+        that say nothing about the model
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRY_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        # с Python 3.10 некорректная дата дает ValueError, а не None
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class _Completions:
+    def __init__(self, transport: "LLMTransport"):
+        self._transport = transport
+
+    def create(self, **request: Any):
+        if request.get("stream"):
+            return self._transport.stream(**request)
+        return self._transport.call("create", **request)
+
+    def parse(self, **request: Any):
+        return self._transport.call("parse", **request)
+
+
+class LLMTransport:
+    """
+    Shared transport for LLM calls of all modules, has the same client.chat.completions.create/parse interface.
+    One pooled keep-alive httpx client, concurrency cap per model, retries with exponential backoff
+    and full jitter on 429/5xx and connection errors (Retry-After is honored), circuit breaker per model.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, default_model_concurrency: Optional[int] = None,
+                 model_concurrency: Optional[dict] = None, max_connections: int = 32, timeout: float = 120.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        :param base_url: OpenAI-compatible API url, by default LLM_BASE_URL env or OpenRouter
+        :param api_key: by default OPENROUTER_API_KEY env
+        :param max_retries: retries of one request on 429/5xx
+        :param backoff_base: first backoff delay in seconds, doubled every attempt
+        :param backoff_max: max backoff delay in seconds
+        :param default_model_concurrency: max requests in flight to one model, by default LLM_MODEL_CONCURRENCY env.
+        Without both the cap starts at DEFAULT_MODEL_CONCURRENCY and grows to worker counts of callers
+        (reserve_concurrency), so it does not throttle their max_workers
+        :param model_concurrency: caps for separate models {model: cap}
+        :param max_connections: size of HTTP connection pool
+        :param timeout: timeout of one request in seconds
+        :param failure_threshold: failures in a row before circuit opens
+        :param reset_timeout: seconds before trial request to opened circuit
+        """
+        # openai и httpx загружаются долго, импортируются только при создании клиента
+        import httpx
+        from openai import OpenAI
+        load_dotenv()
+        api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        if not api_key:
+            raise ValueError("Не найден API ключ OPENROUTER_API_KEY")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if default_model_concurrency is None and os.getenv("LLM_MODEL_CONCURRENCY"):
+            default_model_concurrency = int(os.environ["LLM_MODEL_CONCURRENCY"])
+        # явно заданный лимит не меняется вызывающим кодом
+        self.fixed_concurrency = default_model_concurrency is not None
+        self.default_model_concurrency = default_model_concurrency or DEFAULT_MODEL_CONCURRENCY
+        self.model_concurrency = model_concurrency or {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                keepalive_expiry=60.0),
+            timeout=timeout
+            )
+        self.client = OpenAI(
+            base_url=base_url or os.getenv("LLM_BASE_URL", DEFAULT_BASE_URL),
+            api_key=api_key,
+            http_client=self.http_client,
+            max_retries=0
+            )
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self._semaphores = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _model_state(self, model: str) -> tuple:
+        with self._lock:
+            if model not in self._semaphores:
+                cap = self.model_concurrency.get(model, self.default_model_concurrency)
+                self._semaphores[model] = threading.Semaphore(cap)
+                self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._semaphores[model], self._breakers[model]
+
+    def reserve_concurrency(self, workers: int) -> None:
+        """
+        Raises default cap per model to workers of a caller, no-op if the cap was set explicitly
+        :param workers: requests the caller keeps in flight
+        """
+        with self._lock:
+            if self.fixed_concurrency or workers <= self.default_model_concurrency:
+                return
+            extra = workers - self.default_model_concurrency
+            self.default_model_concurrency = workers
+            for model, semaphore in self._semaphores.items():
+                if model not in self.model_concurrency:
+                    semaphore.release(extra)
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        return self._model_state(model)[1]
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _on_failure(self, error: Exception, attempt: int, breaker: CircuitBreaker, model: Optional[str]) -> None:
+        """
+        Raises error if it is not retryable or retries are exhausted, otherwise sleeps before next attempt
+        """
+        if not _is_retryable(error):
+            # ошибка запроса, а не модели: счетчик сбоев и открытая цепь не меняются
+            breaker.release_trial()
+            raise error
+        breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+        delay = self._delay(attempt, error)
+        print(f"[WARN] Ошибка запроса к {model} ({error}), повтор через {delay:.1f} с")
+        time.sleep(delay)
+
+    def call(self, method: str, **request: Any):
+        """
+        :param method: create or parse
+        :param request: kwargs of chat.completions call
+        :return: response of OpenAI client
+        """
+        semaphore, breaker = self._model_state(request.get("model", ""))
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                with semaphore:
+                    response = getattr(self.client.chat.completions, method)(**request)
+            except Exception as e:
+                self._on_failure(e, attempt, breaker, request.get("model"))
+                attempt += 1
+                continue
+            breaker.record_success()
+            return response
+
+    def stream(self, **request: Any):
+        """
+        Streaming create (stream=True). Request is retried only until the first chunk is received,
+        model concurrency slot is held while chunks are read.
+        :return: iterator of ChatCompletionChunk
+        """
+        request["stream"] = True
+        semaphore, breaker = self._model_state(request.get("model", ""))
+        attempt = 0
+        while True:
+            breaker.before_call()
+            semaphore.acquire()
+            try:
+                response = self.client.chat.completions.create(**request)
+                chunks = iter(response)
+                first = next(chunks, None)
+            except Exception as e:
+                semaphore.release()
+                self._on_failure(e, attempt, breaker, request.get("model"))
+                attempt += 1
+                continue
+            breaker.record_success()
+            try:
+                if first is not None:
+                    yield first
+                yield from chunks
+            finally:
+                response.close()
+                semaphore.release()
+            return
+
+    def close(self) -> None:
+        self.http_client.close()
+
+
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+_reserved_concurrency = 0
+
+
+def reserve_model_concurrency(workers: int) -> None:
+    """
+    Raises cap per model of the shared transport to workers, applied when the transport is created if it does not exist
+    :param workers: requests the caller keeps in flight
+    """
+    global _reserved_concurrency
+    with _shared_transport_lock:
+        _reserved_concurrency = max(_reserved_concurrency, workers)
+        if _shared_transport is not None:
+            _shared_transport.reserve_concurrency(workers)
+
+
+def get_llm_client(concurrency: Optional[int] = None) -> LLMTransport:
+    """
+    Shared transport for all modules, connection pool is reused across stages
+    :param concurrency: requests the caller keeps in flight, cap per model is raised to it
+    (unless LLM_MODEL_CONCURRENCY is set)
+    :return: LLMTransport
+    """
+    global _shared_transport
+    if concurrency:
+        reserve_model_concurrency(concurrency)
+    with _shared_transport_lock:
+        if _shared_transport is None:
+            # пул соединений не меняется после создания, поэтому сразу не меньше заявленных потоков
+            _shared_transport = LLMTransport(max_connections=max(32, _reserved_concurrency))
+            _shared_transport.reserve_concurrency(_reserved_concurrency)
+        return _shared_transport
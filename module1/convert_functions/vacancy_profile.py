@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Union
+
+from .convert_functions import convert_to_dict
+from .text_cache import file_hash
+
+_profiles: Dict[str, "VacancyProfile"] = {}
+_profiles_lock = threading.Lock()
+
+
+def render_vacancy(requirements: dict) -> str:
+    """
+    Compact text of vacancy table for prompts, one "key: value" line per row
+    :param requirements: vacancy table {key: value}
+    :return: prompt fragment
+    """
+    return "\n".join(f"{key}: {value}" for key, value in requirements.items())
+
+
+class VacancyProfile:
+    """
+    Vacancy description parsed once: requirement table, name and prompt fragment rendered in advance.
+    str(profile) is the prompt fragment, so prompts embed it the same way as the vacancy dict before.
+    """
+
+    def __init__(self, path: str, requirements: dict, name: Optional[str] = None, digest: Optional[str] = None,
+                 version: tuple = ()):
+        """
+        :param path: path to vacancy description
+        :param requirements: vacancy table {key: value} from convert_to_dict
+        :param name: vacancy name, by default file name without extension
+        :param digest: hash of file content, key of caches built per vacancy (question bank),
+        by default hash of name and requirement table
+        :param version: (mtime_ns, size) of file when it was parsed
+        """
+        self.path = path
+        self.requirements = requirements
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self.version = version
+        self.prompt_fragment = render_vacancy(requirements)
+        # без хеша файла ключ строится по содержимому, иначе банки разных вакансий совпадут
+        self.digest = digest or hashlib.sha256(f"{self.name}\n{self.prompt_fragment}".encode("utf-8")).hexdigest()
+
+    def __str__(self) -> str:
+        return self.prompt_fragment
+
+    def __repr__(self) -> str:
+        return f"VacancyProfile(name={self.name!r}, path={self.path!r})"
+
+
+def load_vacancy_profile(path: Union[str, VacancyProfile]) -> VacancyProfile:
+    """
+    Function for parsing vacancy describe, result is memoized by file path and mtime,
+    so the file is opened by Aspose once per run while it is not changed
+    :param path: path to vacancy describe or ready VacancyProfile
+    :return: VacancyProfile
+    """
+    if isinstance(path, VacancyProfile):
+        return path
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Файл с описанием вакансии не найден: {path}")
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _profiles_lock:
+        profile = _profiles.get(key)
+        if profile is None or profile.version != version:
+            requirements, name = convert_to_dict(path)
+            profile = _profiles[key] = VacancyProfile(path, requirements, name, file_hash(path), version)
+        return profile
+
+
+def vacancy_title(vacancy: Union[str, VacancyProfile]) -> str:
+    """
+    :param vacancy: vacancy name or VacancyProfile
+    :return: vacancy name
+    """
+    return vacancy.name if isinstance(vacancy, VacancyProfile) else vacancy
@@ -1,31 +1,94 @@
-from openai import OpenAI
-from dotenv import load_dotenv
 import os
-from convert_functions import pydantic_class, prompt, convert_functions
-import time
+import uuid
+from module1.convert_functions import (pydantic_class, prompt, convert_functions, rate_limit, text_cache,
+                                       extraction, llm_cache, prefilter, dedup, checkpoint, transport,
+                                       metrics, vacancy_profile)
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+def _screen_cv(client: transport.LLMTransport, info_cv: str, vacancy: vacancy_profile.VacancyProfile,
+               limiter: rate_limit.TokenBucket,
+               response_cache: Optional[llm_cache.LLMCache], labels: Optional[dict] = None) -> dict:
+    """
+    Function for screening one extracted cv, runs inside LLM worker pool
+    :param client: transport.LLMTransport client
+    :param info_cv: cleaned text of cv
+    :param vacancy: parsed vacancy from load_vacancy_profile
+    :param limiter: shared token bucket for requests to LLM
+    :param response_cache: cache of LLM responses, None - always call LLM
+    :param labels: metric labels (module, vacancy)
+    :return: dict {comment, name, experience, contact_data, answer}
+    """
+    with metrics.pipeline_metrics.stage("prompt_build", **(labels or {})):
+        messages = prompt.prompt_info_fill(info=vacancy, cv_text=info_cv)
+    limiter.acquire()
+    result = llm_cache.parse_cached(
+        client, response_cache, labels,
+        model="deepseek/deepseek-r1-0528:free", #qwen/qwen3-30b-a3b:free  openai/gpt-oss-20b:free deepseek/deepseek-chat-v3.1:free openai/gpt-oss-120b:free deepseek/deepseek-chat-v3.1:free
+        messages=messages,
+        response_format=pydantic_class.Analysis, #CvValidationResult, #JobPosting
+        temperature=0.1,
+        top_p=0.95
+        )
+    return _analysis_to_dict(result)
+
+
+def _analysis_to_dict(result: pydantic_class.Analysis) -> dict:
+    return {
+        "comment": result.comment,
+        "name": result.name,
+        "experience": result.experience,
+        "contact_data": result.contact_data,
+        "answer": result.answer
+        }
 
-load_dotenv()
-api_key = os.getenv("OPENROUTER_API_KEY")
-if not api_key:
-    raise ValueError("Не найден API ключ OPENROUTER_API_KEY")
 
-def cv_validation(folder_cv_path: str, info_cv_path: str) -> dict:
+def _screen_batch(client: transport.LLMTransport, batch: list, vacancy: vacancy_profile.VacancyProfile,
+                  limiter: rate_limit.TokenBucket,
+                  response_cache: Optional[llm_cache.LLMCache], labels: Optional[dict] = None) -> dict:
     """
-    Function for validating all cv hr loaded to folder_cv_path via info about vacancy
-    :param folder_cv_path:  folder with all CV loaded for selected info_cv
-    :param info_cv_path:  path for vacancy describe
-    :return: result dict {link_to_cv:{answer:bool, comment:str}}, additionally info_dict for module 2
+    Function for screening several cv in one request, vacancy is sent once.
+    If batch response can not be parsed, cv of this batch are screened one by one,
+    cv missing in batch response are also screened one by one.
+    :param batch: list of (file, cv_text)
+    :return: dict {file: result dict}
     """
-    if not os.path.exists(folder_cv_path):
-        raise FileNotFoundError(f"Папка с CV не найдена: {folder_cv_path}")
+    if len(batch) == 1:
+        file, info_cv = batch[0]
+        return {file: _screen_cv(client, info_cv, vacancy, limiter, response_cache, labels)}
 
-    if not os.path.exists(info_cv_path):
-        raise FileNotFoundError(f"Файл с описанием вакансии не найден: {info_cv_path}")
+    with metrics.pipeline_metrics.stage("prompt_build", **(labels or {})):
+        messages = prompt.prompt_info_fill_batch(info=vacancy, cv_texts=[info_cv for _, info_cv in batch])
+    limiter.acquire()
+    try:
+        parsed = llm_cache.parse_cached(
+            client, response_cache, labels,
+            model="deepseek/deepseek-r1-0528:free",
+            messages=messages,
+            response_format=pydantic_class.BatchAnalysis,
+            temperature=0.1,
+            top_p=0.95
+            )
+        by_id = {item.cv_id: item for item in parsed.results}
+    except Exception as e:
+        print(f"Не удалось разобрать пакетный ответ, проверяю {len(batch)} CV по одному: {e}")
+        by_id = {}
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-        )
+    results = {}
+    for i, (file, info_cv) in enumerate(batch):
+        item = by_id.get(i + 1)
+        if item is not None:
+            results[file] = _analysis_to_dict(item)
+            continue
+        try:
+            results[file] = _screen_cv(client, info_cv, vacancy, limiter, response_cache, labels)
+        except Exception as e:
+            print(f"Ошибка при обработке файла {file}: {e}")
+            results[file] = {"error": str(e)}
+    return results
+
+
+def _list_cv_files(folder_cv_path: str) -> list:
     try:
         file_paths = [
             os.path.join(folder_cv_path, file)
@@ -36,35 +99,390 @@ def cv_validation(folder_cv_path: str, info_cv_path: str) -> dict:
             raise ValueError(f"Папка {folder_cv_path} пустая или не содержит файлов")
     except Exception as e:
         raise Exception(f"Ошибка при обработке файлов в папке {folder_cv_path}: {e}")
+    return file_paths
+
+
+def iter_cv_validation(folder_cv_path: str, info_cv_path: str, **kwargs) -> Iterator[Tuple[str, dict]]:
+    """
+    Streaming version of cv_validation, yields result of every cv as soon as it is ready (in order of completion).
+    Results are not accumulated, so memory does not grow with folder size.
+    :param folder_cv_path:  folder with all CV loaded for selected info_cv
+    :param info_cv_path:  path for vacancy describe
+    :param kwargs: options of screening (max_workers, requests_per_second, cv_text_cache, extract_processes,
+    extract_queue_size, response_cache, batch_token_budget, max_batch_size, prefilter_threshold, checkpoint_path),
+    see _iter_screening
+    :return: iterator of (link_to_cv, {comment, name, experience, contact_data, answer} or {error})
+    """
+    for file, result, _ in _iter_screening(folder_cv_path, info_cv_path, **kwargs):
+        yield file, result
+
+
+def iter_accepted_candidates(folder_cv_path: str, info_cv_path: str,
+                             on_result: Optional[Callable[[str, dict], None]] = None,
+                             **kwargs) -> Iterator[pydantic_class.CandidateProfile]:
+    """
+    Screening that yields only accepted candidates together with cv text extracted for screening,
+    so question generation (module2) gets them without second extraction pass and JSON round trip.
+    Candidates accepted in checkpoint of previous run are yielded first, their text is taken from cv text cache.
+    :param on_result: called with (file, result) for every screened cv, including rejected and failed
+    :param kwargs: options of screening, see iter_cv_validation
+    :return: iterator of CandidateProfile in order of completion
+    """
+    checkpoint_path = kwargs.get("checkpoint_path")
+    if checkpoint_path is not None:
+        cache = kwargs.setdefault("cv_text_cache", text_cache.TextCache())
+        # последняя запись файла: ошибка могла быть перекрыта успешным повтором
+        results = dict(checkpoint.JsonlCheckpoint(checkpoint_path).iter_results())
+        for file, result in results.items():
+            if "error" in result:
+                # файл будет обработан заново и попадет в on_result из скрининга
+                continue
+            if on_result is not None:
+                on_result(file, result)
+            if result.get("answer") and os.path.exists(file):
+                yield pydantic_class.CandidateProfile(
+                    file=file, analysis=pydantic_class.Analysis.model_validate(result),
+                    cv_text=convert_functions.convert_to_text([file], file_num=0, cache=cache)
+                    )
+    for file, result, cv_text in _iter_screening(folder_cv_path, info_cv_path, keep_text=True, **kwargs):
+        if on_result is not None:
+            on_result(file, result)
+        if result.get("answer"):
+            yield pydantic_class.CandidateProfile(file=file, analysis=pydantic_class.Analysis.model_validate(result),
+                                                  cv_text=cv_text)
+
+
+def _iter_screening(folder_cv_path: str, info_cv_path: str, max_workers: int = 1,
+                    requests_per_second: float = 1.0,
+                    cv_text_cache: Optional[text_cache.TextCache] = None,
+                    extract_processes: Optional[int] = None, extract_queue_size: int = 32,
+                    response_cache: Optional[llm_cache.LLMCache] = None,
+                    batch_token_budget: Optional[int] = None, max_batch_size: int = 10,
+                    prefilter_threshold: Optional[float] = None,
+                    dedup_threshold: Optional[float] = None,
+                    checkpoint_path: Optional[str] = None,
+                    keep_text: bool = False) -> Iterator[Tuple[str, dict, Optional[str]]]:
+    """
+    Screening loop shared by iter_cv_validation and iter_accepted_candidates.
+    :param folder_cv_path:  folder with all CV loaded for selected info_cv
+    :param info_cv_path:  path for vacancy describe or VacancyProfile, parsed vacancy is memoized by path and mtime
+    :param max_workers: number of cv screened concurrently, 1 - sequential mode
+    :param requests_per_second: rate limit for requests to LLM shared by all workers
+    :param cv_text_cache: cache of extracted cv text, by default TextCache in .cache/cv_text
+    :param extract_processes: number of processes converting cv, by default all cores
+    :param extract_queue_size: max number of converted cv waiting for LLM stage
+    :param response_cache: cache of LLM responses, by default shared cache from default_llm_cache()
+    :param batch_token_budget: if set, several cv are screened in one request while estimated prompt
+    tokens fit this budget, None - one request per cv
+    :param max_batch_size: max number of cv in one request in batch mode
+    :param prefilter_threshold: if set, cv scored by local RequirementFilter below it are rejected without LLM,
+    each result then has screening_path (prefilter / llm) and prefilter_score
+    :param dedup_threshold: if set, cv whose text is near duplicate (MinHash similarity >= threshold) of already
+    extracted cv are not screened, they get result of that cv with duplicate_of and duplicate_similarity
+    :param checkpoint_path: JSONL checkpoint, every result is appended to it, cv already present
+    in it (without error) are skipped
+    :param keep_text: yield extracted text of cv, texts are kept only while their cv are in flight
+    :return: iterator of (link_to_cv, {comment, name, experience, contact_data, answer} or {error}, text or None)
+    """
+    if not os.path.exists(folder_cv_path):
+        raise FileNotFoundError(f"Папка с CV не найдена: {folder_cv_path}")
+
+    if max_workers < 1:
+        raise ValueError("max_workers должен быть не меньше 1")
+
+    client = transport.get_llm_client(max_workers)
+    file_paths = _list_cv_files(folder_cv_path)
     try:
-        info_dict,_ = convert_functions.convert_to_dict(file=info_cv_path)
+        vacancy = vacancy_profile.load_vacancy_profile(info_cv_path)
+    except FileNotFoundError:
+        raise
     except Exception as e:
         raise Exception(f"Ошибка при обработке файла с описанием вакансии {info_cv_path}: {e}")
 
+    saver = None
+    if checkpoint_path is not None:
+        saver = checkpoint.JsonlCheckpoint(checkpoint_path)
+        done_files = saver.done_files()
+        skipped = len(file_paths)
+        file_paths = [file for file in file_paths if file not in done_files]
+        skipped -= len(file_paths)
+        if skipped:
+            print(f"Пропущено файлов, уже обработанных в {checkpoint_path}: {skipped}")
+        if not file_paths:
+            return
+
+    limiter = rate_limit.TokenBucket(rate=requests_per_second, capacity=max_workers)
+    cv_text_cache = cv_text_cache or text_cache.TextCache()
+    response_cache = response_cache or llm_cache.default_llm_cache()
+    requirement_filter = None
+    if prefilter_threshold is not None:
+        requirement_filter = prefilter.RequirementFilter(vacancy.requirements, reject_threshold=prefilter_threshold)
+    duplicate_index = dedup.NearDuplicateIndex(dedup_threshold) if dedup_threshold is not None else None
+    # результаты представителей кластеров и дубликаты, ждущие результата своего представителя
+    representative_results = {}
+    duplicates = {}
+    prefilter_scores = {}
+    texts = {}
+    labels = {"module": "module1", "vacancy": vacancy.name}
+
+    def finish_one(file: str, result: dict) -> Tuple[str, dict, Optional[str]]:
+        if saver is not None:
+            saver.append(file, result)
+        return file, result, texts.pop(file, None)
+
+    def finish(file: str, result: dict) -> list:
+        score = prefilter_scores.pop(file, None)
+        if score is not None and "error" not in result:
+            result.setdefault("screening_path", "llm")
+            result.setdefault("prefilter_score", score)
+        finished = [finish_one(file, result)]
+        if duplicate_index is not None:
+            representative_results[file] = result
+            for duplicate, similarity in duplicates.pop(file, ()):
+                finished.append(finish_duplicate(duplicate, file, similarity))
+        return finished
+
+    def finish_duplicate(file: str, representative: str, similarity: float) -> Tuple[str, dict, Optional[str]]:
+        print(f"Дубликат {representative}: {file}")
+        return finish_one(file, dict(representative_results[representative], duplicate_of=representative,
+                                     duplicate_similarity=round(similarity, 3)))
+
+    def collect(done) -> list:
+        finished = []
+        for future in done:
+            files = pending.pop(future)
+            try:
+                for file, result in future.result().items():
+                    print(f"Обработан файл: {file}")
+                    print(result)
+                    finished.extend(finish(file, result))
+            except Exception as e:
+                for file in files:
+                    print(f"Ошибка при обработке файла {file}: {e}")
+                    finished.extend(finish(file, {"error": str(e)}))
+        return finished
+
+    def submit(batch: list) -> list:
+        finished = []
+        if len(pending) >= 2 * max_workers:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            finished = collect(done)
+        future = executor.submit(_screen_batch, client, batch, vacancy, limiter, response_cache, labels)
+        pending[future] = [file for file, _ in batch]
+        return finished
+
+    # извлечение текста в пуле процессов, вызовы LLM в пуле потоков; в работе держим не больше
+    # 2 * max_workers запросов, остальные тексты ждут в ограниченной очереди этапа извлечения
+    pending = {}
+    vacancy_tokens = prompt.estimate_tokens(prompt.SCREENING_SYSTEM_PROMPT + vacancy.prompt_fragment)
+    batch, batch_tokens = [], vacancy_tokens
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file, info_cv, error in extraction.iter_extracted(file_paths, max_processes=extract_processes,
+                                                              queue_size=extract_queue_size, cache=cv_text_cache,
+                                                              labels=labels):
+            if error is not None:
+                print(f"Ошибка при обработке файла {file}: {error}")
+                yield finish_one(file, {"error": error})
+                continue
+            if keep_text:
+                texts[file] = info_cv
+            if duplicate_index is not None:
+                representative, similarity = duplicate_index.add(file, info_cv)
+                if representative != file:
+                    # результат представителя раздается дубликатам, LLM для копии не вызывается
+                    if representative in representative_results:
+                        yield finish_duplicate(file, representative, similarity)
+                    else:
+                        duplicates.setdefault(representative, []).append((file, similarity))
+                    continue
+            if requirement_filter is not None:
+                prefilter_scores[file], rejected = requirement_filter.check(info_cv)
+                if rejected is not None:
+                    print(f"Отклонен фильтром требований: {file}")
+                    yield from finish(file, rejected)
+                    continue
+            if batch_token_budget is None:
+                yield from submit([(file, info_cv)])
+                continue
+            cv_tokens = prompt.estimate_tokens(info_cv or "")
+            if batch and (len(batch) >= max_batch_size or batch_tokens + cv_tokens > batch_token_budget):
+                yield from submit(batch)
+                batch, batch_tokens = [], vacancy_tokens
+            batch.append((file, info_cv))
+            batch_tokens += cv_tokens
+        if batch:
+            yield from submit(batch)
+        yield from collect(wait(pending).done)
+    if duplicate_index is not None:
+        print(f"[INFO] Уникальных CV: {len(duplicate_index)}, дубликатов без вызова LLM: "
+              f"{sum(len(members) - 1 for members in duplicate_index.clusters().values())}")
+    metrics.pipeline_metrics.report_totals(f"вакансии '{vacancy.name}'", **labels)
+
+
+def cv_validation(folder_cv_path: str, info_cv_path: str, checkpoint_path: Optional[str] = None,
+                  **kwargs) -> dict:
+    """
+    Function for validating all cv hr loaded to folder_cv_path via info about vacancy
+    :param folder_cv_path:  folder with all CV loaded for selected info_cv
+    :param info_cv_path:  path for vacancy describe
+    :param checkpoint_path: JSONL checkpoint to resume from, results saved in it are included in result dict
+    :param kwargs: options of iter_cv_validation (max_workers, batch_token_budget, prefilter_threshold, ...)
+    :return: result dict {link_to_cv:{answer:bool, comment:str}}, additionally info_dict for module 2
+    """
     result_dict = {}
-    for i in range(len(file_paths)):
-        file = file_paths[i]
+    if checkpoint_path is not None:
+        result_dict.update(checkpoint.JsonlCheckpoint(checkpoint_path).iter_results())
+    for file, result in iter_cv_validation(folder_cv_path, info_cv_path, checkpoint_path=checkpoint_path, **kwargs):
+        result_dict[file] = result
+    # порядок как в папке, независимо от порядка завершения
+    return {file: result_dict[file] for file in _list_cv_files(folder_cv_path) if file in result_dict}
+
+
+def _match_profile(client: transport.LLMTransport, profile: pydantic_class.CvProfile, profile_text: str,
+                   vacancy: vacancy_profile.VacancyProfile, limiter: rate_limit.TokenBucket,
+                   response_cache: Optional[llm_cache.LLMCache], run_labels: dict) -> dict:
+    """
+    Function for matching ready candidate profile with one vacancy, small request without cv text
+    :param run_labels: metric labels of the run {module, run}, vacancy name is added to them
+    :return: dict {comment, name, experience, contact_data, answer}, name, experience and contacts from profile
+    """
+    labels = {**run_labels, "vacancy": vacancy.name, "call": "match"}
+    with metrics.pipeline_metrics.stage("prompt_build", **labels):
+        messages = prompt.prompt_profile_match(info=vacancy, profile_text=profile_text)
+    limiter.acquire()
+    match = llm_cache.parse_cached(
+        client, response_cache, labels,
+        model="deepseek/deepseek-r1-0528:free",
+        messages=messages,
+        response_format=pydantic_class.VacancyMatch,
+        temperature=0.1,
+        top_p=0.95
+        )
+    return _analysis_to_dict(pydantic_class.Analysis(comment=match.comment, name=profile.name,
+                                                     experience=profile.experience,
+                                                     contact_data=profile.contact_data, answer=match.answer))
+
+
+def _screen_profile(client: transport.LLMTransport, info_cv: str, vacancies: list,
+                    limiter: rate_limit.TokenBucket, response_cache: Optional[llm_cache.LLMCache],
+                    run_labels: dict) -> dict:
+    """
+    Function for screening one extracted cv against several vacancies, runs inside LLM worker pool.
+    Profile of candidate is derived once, then it is matched with every vacancy.
+    :param vacancies: list of VacancyProfile
+    :param run_labels: metric labels of the run {module, run}
+    :return: dict {vacancy path: result dict or {error}}
+    """
+    labels = {**run_labels, "call": "profile"}
+    with metrics.pipeline_metrics.stage("prompt_build", **labels):
+        messages = prompt.prompt_cv_profile(cv_text=info_cv)
+    limiter.acquire()
+    profile = llm_cache.parse_cached(
+        client, response_cache, labels,
+        model="deepseek/deepseek-r1-0528:free",
+        messages=messages,
+        response_format=pydantic_class.CvProfile,
+        temperature=0.1,
+        top_p=0.95
+        )
+    profile_text = prompt.render_cv_profile(profile)
+    results = {}
+    for vacancy in vacancies:
         try:
-            info_cv = convert_functions.convert_to_text(file_list=file_paths, file_num=i)
-            response = client.chat.completions.parse(
-                model="deepseek/deepseek-r1-0528:free", #qwen/qwen3-30b-a3b:free  openai/gpt-oss-20b:free deepseek/deepseek-chat-v3.1:free openai/gpt-oss-120b:free deepseek/deepseek-chat-v3.1:free
-                messages=prompt.prompt_info_fill(info=info_dict, cv_text=info_cv),
-                response_format=pydantic_class.Analysis, #CvValidationResult, #JobPosting
-                temperature=0.1,
-                top_p=0.95
-                )
-            result = response.choices[0].message.parsed
-            result_dict[file] = {
-                "comment": result.comment,
-                "name": result.name,
-                "experience": result.experience,
-                "contact_data": result.contact_data,
-                "answer": result.answer
-                }
-            print(f"Обработан файл: {file}")
-            print(result_dict)
-            time.sleep(1)
+            results[vacancy.path] = _match_profile(client, profile, profile_text, vacancy, limiter, response_cache,
+                                                     run_labels)
         except Exception as e:
-            print(f"Ошибка при обработке файла {file}: {e}")
-            result_dict[file] = {"error": str(e)}
-    return result_dict
+            print(f"Ошибка при сопоставлении с вакансией {vacancy.name}: {e}")
+            results[vacancy.path] = {"error": str(e)}
+    return results
+
+
+def iter_multi_vacancy_validation(folder_cv_path: str, info_cv_paths: list, max_workers: int = 1,
+                                  requests_per_second: float = 1.0,
+                                  cv_text_cache: Optional[text_cache.TextCache] = None,
+                                  extract_processes: Optional[int] = None, extract_queue_size: int = 32,
+                                  response_cache: Optional[llm_cache.LLMCache] = None
+                                  ) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Function for screening one pool of cv against many vacancies in one pass.
+    Every cv is extracted once and its structured profile is derived once (one request with cv text),
+    then the profile is matched with every vacancy by small requests without cv text.
+    :param folder_cv_path:  folder with all CV
+    :param info_cv_paths: paths for vacancy describes (or VacancyProfile)
+    :param max_workers: number of cv screened concurrently
+    :param requests_per_second: rate limit for requests to LLM shared by all workers
+    :param cv_text_cache: cache of extracted cv text, by default TextCache in .cache/cv_text
+    :param extract_processes: number of processes converting cv, by default all cores
+    :param extract_queue_size: max number of converted cv waiting for LLM stage
+    :param response_cache: cache of LLM responses, by default shared cache from default_llm_cache()
+    :return: iterator of (link_to_cv, {vacancy path: {comment, name, experience, contact_data, answer} or {error}})
+    """
+    if not os.path.exists(folder_cv_path):
+        raise FileNotFoundError(f"Папка с CV не найдена: {folder_cv_path}")
+    if not info_cv_paths:
+        raise ValueError("Не задано ни одной вакансии")
+    if max_workers < 1:
+        raise ValueError("max_workers должен быть не меньше 1")
+
+    vacancies = []
+    for info_cv_path in info_cv_paths:
+        try:
+            vacancies.append(vacancy_profile.load_vacancy_profile(info_cv_path))
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"Ошибка при обработке файла с описанием вакансии {info_cv_path}: {e}")
+
+    client = transport.get_llm_client(max_workers)
+    file_paths = _list_cv_files(folder_cv_path)
+    limiter = rate_limit.TokenBucket(rate=requests_per_second, capacity=max_workers)
+    cv_text_cache = cv_text_cache or text_cache.TextCache()
+    response_cache = response_cache or llm_cache.default_llm_cache()
+    # метрики процесса общие, id запуска отделяет этот запуск от прежних
+    labels = {"module": "module1", "run": uuid.uuid4().hex[:12]}
+
+    def collect(done) -> list:
+        finished = []
+        for future in done:
+            file = pending.pop(future)
+            try:
+                results = future.result()
+                print(f"Обработан файл: {file}")
+            except Exception as e:
+                print(f"Ошибка при обработке файла {file}: {e}")
+                results = {vacancy.path: {"error": str(e)} for vacancy in vacancies}
+            finished.append((file, results))
+        return finished
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file, info_cv, error in extraction.iter_extracted(file_paths, max_processes=extract_processes,
+                                                              queue_size=extract_queue_size, cache=cv_text_cache,
+                                                              labels=labels):
+            if error is not None:
+                print(f"Ошибка при обработке файла {file}: {error}")
+                yield file, {vacancy.path: {"error": error} for vacancy in vacancies}
+                continue
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+            future = executor.submit(_screen_profile, client, info_cv, vacancies, limiter, response_cache, labels)
+            pending[future] = file
+        yield from collect(wait(pending).done)
+    for vacancy in vacancies:
+        metrics.pipeline_metrics.report_totals(f"вакансии '{vacancy.name}'", **labels, vacancy=vacancy.name)
+    # в общий итог входят и запросы профиля, они не относятся к одной вакансии
+    metrics.pipeline_metrics.report_totals(f"{len(vacancies)} вакансиям", **labels)
+
+
+def multi_vacancy_validation(folder_cv_path: str, info_cv_paths: list, **kwargs) -> Dict[str, Dict[str, dict]]:
+    """
+    Function for validating pool of cv against many vacancies
+    :param folder_cv_path:  folder with all CV
+    :param info_cv_paths: paths for vacancy describes
+    :param kwargs: options of iter_multi_vacancy_validation (max_workers, requests_per_second, ...)
+    :return: candidate x vacancy matrix {link_to_cv: {vacancy path: {answer:bool, comment:str, ...}}}
+    """
+    matrix = dict(iter_multi_vacancy_validation(folder_cv_path, info_cv_paths, **kwargs))
+    # порядок как в папке, независимо от порядка завершения
+    return {file: matrix[file] for file in _list_cv_files(folder_cv_path) if file in matrix}
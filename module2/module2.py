@@ -1,18 +1,12 @@
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
 import json
 from module1.convert_functions import *
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from module1.module1 import iter_accepted_candidates
 import translitua
-import re  # <-- ДОБАВЛЕНО: Импорт модуля для регулярных выражений
-
-load_dotenv()
-
-api_key = os.getenv("OPENROUTER_API_KEY")
-if not api_key:
-    raise ValueError("Не найден API ключ OPENROUTER_API_KEY")
+import os
+import re
+from functools import lru_cache
 
 
 class Question(BaseModel):
@@ -22,6 +16,24 @@ class Question(BaseModel):
         )
 
 
+class VacancyQuestionBank(BaseModel):
+    general_questions: List[Question] = Field(
+        description="Общие вопросы, не зависящие от CV: зарплатные ожидания, график, удобство добирания до работы и подобные."
+        )
+    soft_skills_questions: List[Question] = Field(
+        description="Вопросы на проверку soft skills (поведенческие, ситуационные навыки)."
+        )
+
+
+class CandidateQuestions(BaseModel):
+    experience_questions: List[Question] = Field(
+        description="Вопросы об опыте работы кандидата, основанные на его CV."
+        )
+    hard_skills_questions: List[Question] = Field(
+        description="Вопросы на проверку hard skills (технические навыки), основанные на вакансии и CV."
+        )
+
+
 class InterviewQuestions(BaseModel):
     general_questions: List[Question] = Field(
         description="Общие вопросы: опыт работы, зарплатные ожидания, удобство добирания до работы и подобные."
@@ -34,7 +46,7 @@ class InterviewQuestions(BaseModel):
         )
 
 
-# --- Ваша логика транслитерации (без изменений) ---
+# --- Логика транслитерации для TTS ---
 custom_translit_map = {
     "Excel": "Эксель",
     "Word": "Ворд",
@@ -49,33 +61,93 @@ custom_translit_map = {
     "SAN": "Сан",
     }
 
+# Слово на латинице из двух и более букв, дефис допускается внутри (Wi-Fi), но не на краях
+LATIN_WORD_PATTERN = re.compile(r"\b[A-Za-z][A-Za-z-]*[A-Za-z]\b")
 
-def transliterate_word(word):
-    # Сначала ищем в ручном словаре (без учета регистра)
-    for k, v in custom_translit_map.items():
-        if k.lower() == word.lower():
-            return v
-    # Если не нашли, используем библиотеку
+
+@lru_cache(maxsize=8192)
+def _translit_cached(word: str) -> str:
     return translitua.translit(word)
 
 
-def process_question_for_tts(question_text):
-    # Находим все слова на латинице
-    latin_words = re.findall(r'[a-zA-Z-]{2,}', question_text)
+def load_translit_map(path: str) -> dict:
+    """
+    Загружает словарь транслитерации из файла: .json {"слово": "замена"}
+    или текстовый файл со строками "слово = замена" (пустые строки и # комментарии пропускаются)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            return json.load(f)
+        mapping = {}
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            word, separator, replacement = line.partition("=")
+            if not separator:
+                raise ValueError(f"Некорректная строка словаря транслитерации: {line}")
+            mapping[word.strip()] = replacement.strip()
+        return mapping
+
+
+class TTSNormalizer:
+    """
+    Транслитерация латиницы в вопросах для синтеза речи за один проход регулярного выражения.
+    Ручной словарь хранится с ключами в casefold, остальные слова идут через translitua с LRU кэшем.
+    """
+
+    def __init__(self, mapping: Optional[dict] = None, dictionary_path: Optional[str] = None):
+        """
+        :param mapping: ручной словарь, по умолчанию custom_translit_map
+        :param dictionary_path: файл словаря (см. load_translit_map), дополняет и переопределяет mapping
+        """
+        mapping = dict(custom_translit_map if mapping is None else mapping)
+        if dictionary_path:
+            mapping.update(load_translit_map(dictionary_path))
+        self.mapping = {word.casefold(): replacement for word, replacement in mapping.items()}
+
+    def transliterate_word(self, word: str) -> str:
+        replacement = self.mapping.get(word.casefold())
+        return replacement if replacement is not None else _translit_cached(word)
+
+    def normalize(self, text: str) -> str:
+        return LATIN_WORD_PATTERN.sub(lambda match: self.transliterate_word(match.group(0)), text)
 
-    processed_text = question_text
-    # Заменяем каждое найденное слово на его транслитерацию
-    for word in set(latin_words):  # set() чтобы не заменять одно и то же слово несколько раз
-        transliterated = transliterate_word(word)
-        # Используем re.sub с \b для замены только целых слов
-        processed_text = re.sub(r'\b' + re.escape(word) + r'\b', transliterated, processed_text)
+    __call__ = normalize
 
-    return processed_text
+    def apply(self, questions: BaseModel) -> BaseModel:
+        """Транслитерирует на месте текст всех вопросов модели (InterviewQuestions, VacancyQuestionBank ...)"""
+        for name in type(questions).model_fields:
+            for item in getattr(questions, name):
+                if isinstance(item, Question):
+                    item.question = self.normalize(item.question)
+        return questions
 
 
-# --- Конец блока вашей логики ---
+_default_normalizer = None
 
-def prompt_question_block(info: dict, cv_text: str) -> List[dict]:
+
+def default_tts_normalizer() -> TTSNormalizer:
+    """
+    Общий нормализатор, дополнительный словарь берется из TTS_TRANSLIT_DICT env
+    """
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = TTSNormalizer(dictionary_path=os.getenv("TTS_TRANSLIT_DICT"))
+    return _default_normalizer
+
+
+def transliterate_word(word):
+    return default_tts_normalizer().transliterate_word(word)
+
+
+def process_question_for_tts(question_text):
+    return default_tts_normalizer().normalize(question_text)
+
+
+# --- Конец блока логики транслитерации ---
+
+def prompt_question_block(info: VacancyProfile, cv_text: str) -> List[dict]:
     """
     Функция для создания промпта для генерации блока вопросов.
     """
@@ -106,58 +178,235 @@ def prompt_question_block(info: dict, cv_text: str) -> List[dict]:
         ]
 
 
-def question_block(info_cv: str, json_path: str) -> dict:
+def prompt_vacancy_question_bank(info: VacancyProfile) -> List[dict]:
     """
-    Function for processing the JSON with CV analyses, generating question blocks only for candidates with "answer": true.
-    For each such candidate, reads the full CV text from the path (key in JSON), generates questions, and returns a separate dict with questions.
-    :param info_cv: path to info about job
-    :param json_path: path to the JSON file with CV analyses (invo_cv_text)
-    :return: returns a dict with CV paths as keys and their corresponding questions (or None if "answer": false)
+    Функция для создания промпта банка вопросов вакансии: общие вопросы и soft skills, не зависящие от CV.
     """
-    info, _ = convert_to_dict(info_cv)
+    prompt_content = f"""
+    Описание вакансии: {info}
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        invo_cv = json.load(f)
+    Сгенерируй вопросы для первичного HR-собеседования, одинаковые для всех кандидатов на эту вакансию.
+    Раздели вопросы на две категории:
+    - general_questions: Общие вопросы, такие как зарплатные ожидания, удобно ли добираться до работы, устраивает ли график. Должно быть 2-3 вопроса.
+    - soft_skills_questions: Вопросы на проверку soft skills (коммуникация, командная работа, решение проблем и т.д.).
 
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-        )
+    Регулируй количество soft skills вопросов в зависимости от типа вакансии:
+    - Если вакансия техническая (IT, инженерия, разработка и т.п.), сделай 3-5 вопросов.
+    - Если вакансия больше ориентирована на soft skills (менеджмент, продажи, HR и т.п.), сделай 7-10 вопросов.
+    - Для смешанных вакансий сделай 5-6 вопросов.
 
-    result = {}
-    for cv_path, data in invo_cv.items():
-        if data.get("answer", False):
-            cv_text = convert_to_text(cv_path, file_num=0)
+    expected_response ты заполняешь только для general_questions. В soft_skills ты оставляешь его null
+    НИ В КОЕМ СЛУЧАЕ НЕ ИСПОЛЬЗУЙ АНГЛИЙСКИЕ СИМВОЛЫ ИЛИ ТЕРМИНЫ, ВСЕ ПЕРЕВОДИ НА РУССКИЙ, ДАЖЕ НАЗВАНИЯ СОФТА ИЛИ ЕЩЕ ЧЕГО ЛИБО, ТОЛЬКО РУССКИЙ ЯЗЫК
+    """
+    return [
+        {"role": "system",
+         "content": "Ты — HR-ассистент, генерирующий вопросы для собеседования на основе вакансии."},
+        {"role": "user", "content": prompt_content}
+        ]
 
-            response = client.chat.completions.parse(
-                model="deepseek/deepseek-r1-0528:free",
-                messages=prompt_question_block(info=info, cv_text=cv_text),
-                response_format=InterviewQuestions,
-                temperature=0.1,
-                top_p=0.95
-                )
 
-            questions = response.choices[0].message.parsed
+def prompt_candidate_questions(info: VacancyProfile, cv_text: str, profile: Optional[Analysis] = None) -> List[dict]:
+    """
+    Функция для создания промпта персональных вопросов кандидата: опыт и hard skills по CV.
+    profile - результат скрининга, выжимка опыта и обоснование помогают сфокусировать вопросы.
+    """
+    screening = ""
+    if profile is not None:
+        screening = f"""
+    Выжимка опыта по итогам скрининга: {profile.experience}
+    Обоснование скрининга: {profile.comment}
+"""
+    prompt_content = f"""
+    Описание вакансии: {info}
+    Текст резюме кандидата: {cv_text}
+{screening}
+    Сгенерируй персональные вопросы для первичного HR-собеседования этого кандидата.
+    Раздели вопросы на две категории:
+    - experience_questions: Вопросы об опыте работы кандидата по его CV. Должно быть 1-2 вопроса.
+    - hard_skills_questions: Вопросы на проверку hard skills (технические навыки). Основывайся на требованиях вакансии и опыте из CV.
 
-            # --- НАЧАЛО ВНЕДРЕННОГО БЛОКА ---
-            # Пост-обработка сгенерированных вопросов для TTS.
-            # Несмотря на инструкцию в промпте, модель может иногда использовать латиницу.
-            # Этот блок гарантирует, что все термины будут транслитерированы.
+    Регулируй количество hard skills вопросов в зависимости от типа вакансии:
+    - Если вакансия техническая (IT, инженерия, разработка и т.п.), сделай 7-10 вопросов.
+    - Если вакансия больше ориентирована на soft skills (менеджмент, продажи, HR и т.п.), сделай 3-5 вопросов.
+    - Для смешанных вакансий сделай 5-6 вопросов.
 
-            for q_list in [questions.general_questions, questions.hard_skills_questions,
-                           questions.soft_skills_questions]:
-                for item in q_list:
-                    item.question = process_question_for_tts(item.question)
-            # --- КОНЕЦ ВНЕДРЕННОГО БЛОКА ---
+    expected_response заполняй для всех вопросов.
+    НИ В КОЕМ СЛУЧАЕ НЕ ИСПОЛЬЗУЙ АНГЛИЙСКИЕ СИМВОЛЫ ИЛИ ТЕРМИНЫ, ВСЕ ПЕРЕВОДИ НА РУССКИЙ, ДАЖЕ НАЗВАНИЯ СОФТА ИЛИ ЕЩЕ ЧЕГО ЛИБО, ТОЛЬКО РУССКИЙ ЯЗЫК
+    """
+    return [
+        {"role": "system",
+         "content": "Ты — HR-ассистент, генерирующий вопросы для собеседования на основе вакансии и CV."},
+        {"role": "user", "content": prompt_content}
+        ]
 
-            result[cv_path] = questions.model_dump()
 
+QUESTION_BANK_VERSION = "v1"
+DEFAULT_QUESTION_BANK_DIR = os.path.join(".cache", "question_bank")
+
+
+def get_question_bank(vacancy: VacancyProfile, client, response_cache: Optional[LLMCache], labels: dict,
+                      bank_cache: Optional[TextCache] = None) -> VacancyQuestionBank:
+    """
+    Function for getting question bank of vacancy, generated once and cached by hash of vacancy file
+    :param vacancy: parsed vacancy from load_vacancy_profile
+    :param bank_cache: storage of question banks, by default QUESTION_BANK_DIR env or .cache/question_bank
+    :return: VacancyQuestionBank
+    """
+    bank_cache = bank_cache or TextCache(os.getenv("QUESTION_BANK_DIR", DEFAULT_QUESTION_BANK_DIR))
+    key = f"{vacancy.digest}_{QUESTION_BANK_VERSION}"
+    cached = bank_cache.get(key)
+    if cached is not None:
+        return VacancyQuestionBank.model_validate_json(cached)
+    with pipeline_metrics.stage("prompt_build", **labels):
+        messages = prompt_vacancy_question_bank(info=vacancy)
+    bank = parse_cached(
+        client, response_cache, labels,
+        model="deepseek/deepseek-r1-0528:free",
+        messages=messages,
+        response_format=VacancyQuestionBank,
+        temperature=0.1,
+        top_p=0.95
+        )
+    bank_cache.put(key, bank.model_dump_json())
+    return bank
+
+
+def _screening_profile(cv_path: str, data: dict, cv_text: str) -> CandidateProfile:
+    """
+    Builds CandidateProfile from entry of screening JSON, missing fields of old results are left empty
+    """
+    analysis = Analysis(comment=data.get("comment") or "", name=data.get("name"),
+                        experience=data.get("experience") or [], contact_data=data.get("contact_data"),
+                        answer=bool(data.get("answer")))
+    return CandidateProfile(file=cv_path, analysis=analysis, cv_text=cv_text)
+
+
+def generate_candidate_questions(candidate: CandidateProfile, vacancy: VacancyProfile,
+                                 bank: Optional[VacancyQuestionBank],
+                                 client, response_cache: Optional[LLMCache], labels: dict,
+                                 tts_normalizer: TTSNormalizer) -> dict:
+    """
+    Function for generating questions of one candidate, thread safe, used by iter_question_blocks and orchestrator
+    :param candidate: CandidateProfile from screening
+    :param vacancy: parsed vacancy from load_vacancy_profile
+    :param bank: normalized vacancy question bank, None - all questions are generated for candidate
+    :return: InterviewQuestions dict
+    """
+    with pipeline_metrics.stage("prompt_build", **labels):
+        if bank is not None:
+            messages = prompt_candidate_questions(info=vacancy, cv_text=candidate.cv_text, profile=candidate.analysis)
         else:
-            result[cv_path] = None
+            messages = prompt_question_block(info=vacancy, cv_text=candidate.cv_text)
+
+    questions = parse_cached(
+        client, response_cache, labels,
+        model="deepseek/deepseek-r1-0528:free",
+        messages=messages,
+        response_format=CandidateQuestions if bank is not None else InterviewQuestions,
+        temperature=0.1,
+        top_p=0.95
+        )
+
+    # --- НАЧАЛО ВНЕДРЕННОГО БЛОКА ---
+    # Пост-обработка сгенерированных вопросов для TTS.
+    # Несмотря на инструкцию в промпте, модель может иногда использовать латиницу.
+    # Этот блок гарантирует, что все термины будут транслитерированы.
+
+    tts_normalizer.apply(questions)
+    # --- КОНЕЦ ВНЕДРЕННОГО БЛОКА ---
+
+    if bank is not None:
+        questions = InterviewQuestions(
+            general_questions=bank.general_questions + questions.experience_questions,
+            hard_skills_questions=questions.hard_skills_questions,
+            soft_skills_questions=bank.soft_skills_questions
+            )
+    return questions.model_dump()
+
+
+def iter_question_blocks(info_cv: Union[str, VacancyProfile], candidates: Iterable[CandidateProfile],
+                         response_cache: Optional[LLMCache] = None, tts_normalizer: Optional[TTSNormalizer] = None,
+                         use_question_bank: bool = True,
+                         bank_cache: Optional[TextCache] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Function for generating question blocks for accepted candidates as they arrive.
+    Screening profile (experience, comment) and cv text are taken from CandidateProfile, cv is not read again.
+    With use_question_bank general and soft skills questions are taken from vacancy question bank (generated once per vacancy),
+    only experience and hard skills questions are generated per candidate.
+    :param info_cv: path to info about job or VacancyProfile
+    :param candidates: iterable of CandidateProfile, e.g. module1.iter_accepted_candidates
+    :param response_cache: cache of LLM responses, by default shared cache from default_llm_cache()
+    :param tts_normalizer: transliteration of questions for TTS, by default default_tts_normalizer()
+    :param use_question_bank: generate only cv-dependent questions per candidate
+    :param bank_cache: storage of vacancy question banks
+    :return: iterator of (cv path, questions dict)
+    """
+    vacancy = load_vacancy_profile(info_cv)
+    labels = {"module": "module2", "vacancy": vacancy.name}
+    client = get_llm_client()
+    response_cache = response_cache or default_llm_cache()
+    tts_normalizer = tts_normalizer or default_tts_normalizer()
+
+    bank = None
+    for candidate in candidates:
+        if use_question_bank and bank is None:
+            bank = tts_normalizer.apply(get_question_bank(vacancy, client, response_cache, labels, bank_cache))
+        yield candidate.file, generate_candidate_questions(candidate, vacancy, bank, client, response_cache, labels,
+                                                           tts_normalizer)
+
+    pipeline_metrics.report_totals(f"вакансии '{vacancy.name}'", **labels)
+
+
+def question_block(info_cv: str, json_path: str, cv_text_cache: Optional[TextCache] = None,
+                   response_cache: Optional[LLMCache] = None, tts_normalizer: Optional[TTSNormalizer] = None,
+                   use_question_bank: bool = True, bank_cache: Optional[TextCache] = None) -> dict:
+    """
+    Function for processing the JSON with CV analyses, generating question blocks only for candidates with "answer": true.
+    For each such candidate, takes CV text from cv_text_cache (extracted on screening), generates questions,
+    and returns a separate dict with questions. Without JSON round trip use questions_from_screening.
+    :param info_cv: path to info about job
+    :param json_path: path to the JSON file with CV analyses (invo_cv_text)
+    :param cv_text_cache: cache of extracted cv text shared with cv_validation, by default .cache/cv_text
+    :param response_cache: cache of LLM responses, by default shared cache from default_llm_cache()
+    :param tts_normalizer: transliteration of questions for TTS, by default default_tts_normalizer()
+    :param use_question_bank: generate only cv-dependent questions per candidate
+    :param bank_cache: storage of vacancy question banks
+    :return: returns a dict with CV paths as keys and their corresponding questions (or None if "answer": false)
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        invo_cv = json.load(f)
 
+    cv_text_cache = cv_text_cache or TextCache()
+
+    def candidates() -> Iterator[CandidateProfile]:
+        for cv_path, data in invo_cv.items():
+            if data.get("answer", False):
+                cv_text = convert_to_text([cv_path], file_num=0, cache=cv_text_cache)
+                yield _screening_profile(cv_path, data, cv_text)
+
+    result = {cv_path: None for cv_path in invo_cv}
+    result.update(iter_question_blocks(info_cv, candidates(), response_cache=response_cache,
+                                       tts_normalizer=tts_normalizer, use_question_bank=use_question_bank,
+                                       bank_cache=bank_cache))
     return result
 
 
+def questions_from_screening(folder_cv_path: str, info_cv_path: str, screening_options: Optional[dict] = None,
+                             **kwargs) -> dict:
+    """
+    Function for screening folder of cv and generating questions for accepted candidates in one pass:
+    candidates go to question generation as soon as they are accepted, cv text extracted for screening is reused.
+    :param folder_cv_path: folder with all CV loaded for selected info_cv
+    :param info_cv_path: path for vacancy describe
+    :param screening_options: options of module1 screening (max_workers, checkpoint_path, ...)
+    :param kwargs: options of iter_question_blocks
+    :return: dict {cv path: questions dict} for accepted candidates
+    """
+    candidates = iter_accepted_candidates(folder_cv_path, info_cv_path, **(screening_options or {}))
+    return dict(iter_question_blocks(info_cv_path, candidates, **kwargs))
+
+
 # Пример использования
-print(question_block(info_cv=r"D:\download\Описание ИТ.docx",
-                     json_path=r"D:\pycharm\vtb_hack_hh\module1\results\cv_validation_results_20250907_140144.json"))
\ No newline at end of file
+if __name__ == '__main__':
+    print(question_block(info_cv=r"D:\download\Описание ИТ.docx",
+                         json_path=r"D:\pycharm\vtb_hack_hh\module1\results\cv_validation_results_20250907_140144.json"))
\ No newline at end of file
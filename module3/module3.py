@@ -1,19 +1,28 @@
-from openai import OpenAI
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Literal, Any
+from typing import Dict, List, Optional, Literal, Any, Callable, Union
 from enum import Enum
 import json
+import re
+import time
 from datetime import datetime
 import os
+import sys
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from testing.entries import interview_questions2
-from rich import print
+from module1.convert_functions.llm_cache import LLMCache, default_llm_cache, tool_call_cached, content_cached
+from module1.convert_functions.transport import LLMTransport, get_llm_client
+from module1.convert_functions.metrics import pipeline_metrics
+from module1.convert_functions.vacancy_profile import VacancyProfile, load_vacancy_profile, vacancy_title
+from module3.session_store import SessionStore
 
 load_dotenv()
 
-api_key = os.getenv("OPENROUTER_API_KEY")
-if not api_key:
-    raise ValueError("Не найден API ключ OPENROUTER_API_KEY")
+
+def print(*args, **kwargs):
+    """Вывод через rich.print, rich загружается при первом выводе, а не при импорте модуля"""
+    from rich import print as rich_print
+    rich_print(*args, **kwargs)
 
 
 # ==============================================================================
@@ -21,10 +30,13 @@ if not api_key:
 # ==============================================================================
 
 class InterviewState:
-    # Этот класс не меняется, он идеально подходит для сбора данных
-    def __init__(self, questions_data: Dict):
-        self.questions_asked = 0
-        self.collected_data_by_category = {}
+    """
+    Состояние интервью с индексом ответов по id вопроса: запись и поиск ответа за O(1).
+    С store каждое изменение сразу сохраняется в SessionStore, и состояние восстанавливается после перезапуска.
+    """
+
+    def __init__(self, questions_data: Dict, store: Optional[SessionStore] = None, session_id: Optional[str] = None,
+                 vacancy_name: Optional[str] = None):
         self.all_questions = []
         for category, questions_list in questions_data.items():
             for i, q in enumerate(questions_list):
@@ -34,6 +46,26 @@ class InterviewState:
                     "question": q.get("question"),
                     "example_answer": q.get("expected_response")
                     })
+        self._ids_by_question = {(q["category"], q["question"]): q["id"] for q in self.all_questions}
+        self.store = store
+        self.session_id = session_id
+        if store is not None:
+            if session_id is None:
+                raise ValueError("Для сохранения состояния нужен session_id")
+            record = store.open_session(session_id, vacancy_name, questions_data)
+            self.questions_asked = record["questions_asked"]
+            self._answers = dict(record["answers"])
+        else:
+            self.questions_asked = 0
+            self._answers = {}
+
+    @property
+    def collected_data_by_category(self) -> Dict[str, List[Dict]]:
+        collected = {}
+        for entry in self._answers.values():
+            collected.setdefault(entry["category"], []).append({"question": entry["question"],
+                                                                "answer": entry["answer"]})
+        return collected
 
     def get_current_question(self):
         if self.questions_asked < len(self.all_questions):
@@ -41,32 +73,159 @@ class InterviewState:
         return None
 
     def collect_answer(self, category: str, question_text: str, user_answer: str):
-        if category not in self.collected_data_by_category:
-            self.collected_data_by_category[category] = []
-        answers_for_category = self.collected_data_by_category[category]
-        updated_answers = [ans for ans in answers_for_category if ans.get("question") != question_text]
-        updated_answers.append({"question": question_text, "answer": user_answer})
-        self.collected_data_by_category[category] = updated_answers
+        question_id = self._ids_by_question.get((category, question_text), f"{category}:{question_text}")
+        # Замененный ответ переносится в конец категории
+        self._answers.pop(question_id, None)
+        self._answers[question_id] = {"category": category, "question": question_text, "answer": user_answer}
+        if self.store is not None:
+            self.store.upsert_answer(self.session_id, question_id, category, question_text, user_answer)
+
+    def get_answer(self, question_id: str) -> Optional[str]:
+        entry = self._answers.get(question_id)
+        return entry["answer"] if entry else None
+
+    def _save_progress(self):
+        if self.store is not None:
+            self.store.save_progress(self.session_id, self.questions_asked)
 
     def move_to_next_question(self):
         self.questions_asked += 1
+        self._save_progress()
 
     def move_to_previous_question(self):
         if self.questions_asked > 0:
             self.questions_asked -= 1
+            self._save_progress()
 
     def is_interview_complete(self):
         return self.questions_asked >= len(self.all_questions)
 
 
+def _partial_json_string(buffer: str, key: str) -> str:
+    """
+    Достает уже полученную часть строкового значения key из незавершенного JSON (аргументы инструмента в потоке)
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(key), buffer)
+    if not match:
+        return ""
+    start = i = match.end()
+    while i < len(buffer):
+        char = buffer[i]
+        if char == "\\":
+            length = 6 if buffer[i + 1:i + 2] == "u" else 2
+            if i + length > len(buffer):
+                break
+            i += length
+            continue
+        if char == '"':
+            break
+        i += 1
+    try:
+        return json.loads(f'"{buffer[start:i]}"')
+    except json.JSONDecodeError:
+        return ""
+
+
+class LocalIntentClassifier:
+    """
+    Локальный (без сети) уровень классификации реплик кандидата на правилах: регулярные выражения и словарь.
+    Распознает REPEAT_REQUEST, PREVIOUS_QUESTION_REQUEST и тривиальные ответы ("не знаю", "нет", "дальше").
+    Правила запросов привязаны к короткой реплике целиком ("повторите, пожалуйста", "вернемся к предыдущему
+    вопросу"): слова "назад" или "повторные" внутри содержательного ответа не должны переключать вопрос.
+    Уверенность падает с длиной реплики, длинные реплики уходят в модель.
+    """
+    _POLITE = r"(?:(?:пожалуйста|давайте|можно|а) )*"
+    _PLEASE = r"(?: пожалуйста)?"
+    REPEAT_PATTERNS = [r"(?:повторите|повтори|повторить)(?: (?:еще раз|вопрос|последний вопрос))?",
+                       r"(?:можете|могли бы вы|можно) повторить(?: вопрос)?",
+                       r"(?:я )?не (?:рас)?слышала?(?: вопрос)?", r"(?:я )?не услышала?(?: вопрос)?",
+                       r"какой (?:был )?вопрос"]
+    PREVIOUS_PATTERNS = [r"(?:вернитесь|вернемся|вернуться|вернись)(?: назад)? к (?:предыдущему|прошлому) вопросу",
+                         r"(?:предыдущий|прошлый) вопрос"]
+    TRIVIAL_ANSWERS = {"не знаю", "нет", "никак", "не сталкивался", "не сталкивалась", "не работал", "не работала",
+                       "нет опыта", "не было", "не имею опыта", "затрудняюсь ответить", "пропустить", "пропустим",
+                       "дальше", "далее", "следующий", "следующий вопрос", "давайте дальше", "без понятия",
+                       "не помню"}
+    MESSAGES = {"ANSWER": "Спасибо за ответ.", "REPEAT_REQUEST": "Конечно, повторяю: {question}",
+                "PREVIOUS_QUESTION_REQUEST": "Хорошо, возвращаемся к предыдущему вопросу."}
+
+    def __init__(self, threshold: float = 0.9, max_words: int = 8):
+        """
+        :param threshold: минимальная уверенность, при которой реплика не отправляется в модель
+        :param max_words: реплики длиннее считаются содержательными и всегда уходят в модель
+        """
+        self.threshold = threshold
+        self.max_words = max_words
+        self._repeat = re.compile(f"{self._POLITE}(?:{'|'.join(self.REPEAT_PATTERNS)}){self._PLEASE}")
+        self._previous = re.compile(f"{self._POLITE}(?:{'|'.join(self.PREVIOUS_PATTERNS)}){self._PLEASE}")
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = text.lower().replace("ё", "е")
+        return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+    def classify(self, user_input: str) -> Optional[tuple]:
+        """
+        :return: (response_type, confidence) или None, если правила не сработали
+        """
+        text = self._normalize(user_input)
+        words = len(text.split())
+        if not text or words > self.max_words:
+            return None
+        if text in self.TRIVIAL_ANSWERS:
+            return "ANSWER", 1.0
+        # Чем больше слов помимо совпадения, тем ниже уверенность
+        length_penalty = 0.03 * max(words - 3, 0)
+        previous = self._previous.fullmatch(text) is not None
+        repeat = self._repeat.fullmatch(text) is not None
+        if previous and not repeat:
+            return "PREVIOUS_QUESTION_REQUEST", 0.98 - length_penalty
+        if repeat and not previous:
+            return "REPEAT_REQUEST", 0.97 - length_penalty
+        return None
+
+    def resolve(self, user_input: str, current_question: Dict) -> Optional[Dict]:
+        """
+        :return: аргументы как у инструмента process_response или None, если реплику нужно отправить в модель
+        """
+        result = self.classify(user_input)
+        if result is None or result[1] < self.threshold:
+            return None
+        response_type = result[0]
+        return {"response_type": response_type,
+                "message": self.MESSAGES[response_type].format(question=current_question["question"])}
+
+
 class AIHRPipeline:
+    # Сообщение этих типов может быть заменено в _apply_response, в поток оно уходит только после проверки
+    BUFFERED_RESPONSE_TYPES = {"PREVIOUS_QUESTION_REQUEST"}
+
     # --- ИЗМЕНЕНИЕ 1: Удаляем из класса всю логику анализа ---
-    def __init__(self, questions_data: Dict, vacancy_name: str):
-        self.state = InterviewState(questions_data)
-        self.client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=api_key)
+    def __init__(self, questions_data: Dict, vacancy_name: Union[str, VacancyProfile], background_grading: bool = True,
+                 response_cache: Optional[LLMCache] = None, fast_path_threshold: Optional[float] = 0.9,
+                 grader_executor: Optional[ThreadPoolExecutor] = None, session_store: Optional[SessionStore] = None,
+                 session_id: Optional[str] = None):
+        # Название берется из разобранной вакансии, если передан VacancyProfile
+        vacancy_name = vacancy_title(vacancy_name)
+        self.state = InterviewState(questions_data, session_store, session_id, vacancy_name)
+        self.questions_data = questions_data
+        self.client = get_llm_client()
         self.interaction_tool = self._create_interaction_tool_definitions()
         self.model_name = "deepseek/deepseek-chat-v3.1:free"
         self.vacancy_name = vacancy_name
+        # Ответы оцениваются в фоне сразу после сбора, к концу интервью отчет почти готов
+        self.grader = BackgroundGrader(vacancy_name, response_cache=response_cache,
+                                       executor=grader_executor) if background_grading else None
+        # Очевидные реплики классифицируются локально, None отключает локальный уровень
+        self.intent_classifier = LocalIntentClassifier(
+            fast_path_threshold) if fast_path_threshold is not None else None
+
+    @classmethod
+    def restore(cls, session_store: SessionStore, session_id: str, **kwargs) -> "AIHRPipeline":
+        """Восстанавливает интервью из хранилища сессий, например после перезапуска процесса"""
+        record = session_store.load_session(session_id)
+        return cls(record["questions_data"], record["vacancy"], session_store=session_store, session_id=session_id,
+                   **kwargs)
 
     def _create_interaction_tool_definitions(self):
         return [{"type": "function",
@@ -96,28 +255,117 @@ class AIHRPipeline:
 - Если `PREVIOUS_QUESTION_REQUEST`: скажи "Хорошо, возвращаемся к предыдущему вопросу."
 """
 
-    def process_user_input(self, user_input: str) -> Dict[str, Any]:
+    def process_user_input(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        :param user_input: реплика кандидата
+        :param on_token: если передан, сообщение интервьюера отдается по частям по мере генерации моделью
+        (например, для синтеза речи), итоговое сообщение все равно возвращается целиком
+        """
         current_question = self.state.get_current_question()
         if not current_question:
             # По завершении просто возвращаем собранные данные
             return {"message": "Собеседование завершено! Спасибо.", "interview_complete": True,
                     "collected_data": self.state.collected_data_by_category}
 
-        messages = [
-            {"role": "system", "content": self._create_system_prompt(current_question)},
-            {"role": "user", "content": f"Ответ кандидата для классификации: <<< {user_input} >>>"}
-            ]
+        start = time.perf_counter()
+        streamed = []
+
+        def emit(token: str) -> None:
+            if not streamed:
+                pipeline_metrics.record_stage("first_token", time.perf_counter() - start, module="module3",
+                                              vacancy=self.vacancy_name)
+            streamed.append(token)
+            on_token(token)
+
+        tool_args = self.intent_classifier.resolve(user_input, current_question) if self.intent_classifier else None
+        tier = "local" if tool_args is not None else "llm"
+        if tool_args is None:
+            tool_args = self._classify_with_llm(user_input, current_question, emit if on_token else None)
+        if tool_args is None:
+            return {"message": "Произошла внутренняя ошибка."}
+        final_response = self._apply_response(tool_args, user_input, current_question)
+        final_response["tier"] = tier
+        # Дописываем то, что не пришло из потока: локальный ответ, сообщение придержанного типа целиком
+        # или добавку "Это был последний вопрос."
+        sent = "".join(streamed)
+        if on_token and final_response["message"].startswith(sent) and len(final_response["message"]) > len(sent):
+            emit(final_response["message"][len(sent):])
+        pipeline_metrics.record_stage("turn", time.perf_counter() - start, module="module3",
+                                      vacancy=self.vacancy_name, tier=tier)
+        return final_response
+
+    def turn_latency(self) -> Dict[str, Dict]:
+        """
+        Задержка ходов интервью с разбивкой по уровню, который обработал ход
+        :return: {tier: {calls, seconds, avg_ms}}
+        """
+        stats = {}
+        for tier in ("local", "llm"):
+            turn = pipeline_metrics.totals(module="module3", vacancy=self.vacancy_name, tier=tier)["stages"].get(
+                "turn", {"calls": 0, "seconds": 0.0})
+            avg_ms = round(1000 * turn["seconds"] / turn["calls"], 2) if turn["calls"] else 0.0
+            stats[tier] = {**turn, "avg_ms": avg_ms}
+        return stats
+
+    def _classify_with_llm(self, user_input: str, current_question: Dict,
+                           on_token: Optional[Callable[[str], None]] = None) -> Optional[Dict]:
+        labels = {"module": "module3", "vacancy": self.vacancy_name}
+        with pipeline_metrics.stage("prompt_build", **labels):
+            messages = [
+                {"role": "system", "content": self._create_system_prompt(current_question)},
+                {"role": "user", "content": f"Ответ кандидата для классификации: <<< {user_input} >>>"}
+                ]
+        if on_token is not None:
+            return self._classify_streaming(messages, labels, on_token)
         try:
-            response = self.client.chat.completions.create(model=self.model_name, messages=messages,
-                                                           tools=self.interaction_tool, tool_choice={"type": "function",
-                                                                                                     "function": {
-                                                                                                         "name": "process_response"}},
-                                                           temperature=0.1)
-            tool_args = json.loads(response.choices[0].message.tool_calls[0].function.arguments)
+            with pipeline_metrics.stage("llm_call", **labels):
+                response = self.client.chat.completions.create(model=self.model_name, messages=messages,
+                                                               tools=self.interaction_tool, tool_choice={"type": "function",
+                                                                                                         "function": {
+                                                                                                             "name": "process_response"}},
+                                                               temperature=0.1)
+            pipeline_metrics.record_usage(self.model_name, response.usage, **labels)
+            with pipeline_metrics.stage("parse", **labels):
+                tool_args = json.loads(response.choices[0].message.tool_calls[0].function.arguments)
         except Exception as e:
             print(f"[ERROR] Ошибка вызова API: {e}")
-            return {"message": "Произошла внутренняя ошибка."}
+            return None
+        return tool_args
+
+    def _classify_streaming(self, messages: List[Dict], labels: Dict,
+                            on_token: Callable[[str], None]) -> Optional[Dict]:
+        """
+        Тот же вызов инструмента в потоковом режиме, поле message отдается в on_token по мере поступления.
+        Пока response_type не получен, и для типов из BUFFERED_RESPONSE_TYPES (_apply_response может заменить
+        сообщение) части копятся и не отдаются, итоговое сообщение дописывает process_user_input.
+        """
+        arguments, message, sent, usage = "", "", 0, None
+        try:
+            with pipeline_metrics.stage("llm_call", **labels):
+                for chunk in self.client.chat.completions.create(
+                        model=self.model_name, messages=messages, tools=self.interaction_tool,
+                        tool_choice={"type": "function", "function": {"name": "process_response"}},
+                        temperature=0.1, stream=True, stream_options={"include_usage": True}):
+                    usage = chunk.usage or usage
+                    if not chunk.choices:
+                        continue
+                    for tool_call in chunk.choices[0].delta.tool_calls or []:
+                        if tool_call.function and tool_call.function.arguments:
+                            arguments += tool_call.function.arguments
+                    message = _partial_json_string(arguments, "message")
+                    response_type = re.search(r'"response_type"\s*:\s*"(\w+)"', arguments)
+                    if (response_type and response_type.group(1) not in self.BUFFERED_RESPONSE_TYPES
+                            and len(message) > sent):
+                        on_token(message[sent:])
+                        sent = len(message)
+            pipeline_metrics.record_usage(self.model_name, usage, **labels)
+            with pipeline_metrics.stage("parse", **labels):
+                return json.loads(arguments)
+        except Exception as e:
+            print(f"[ERROR] Ошибка вызова API: {e}")
+            return None
 
+    def _apply_response(self, tool_args: Dict, user_input: str, current_question: Dict) -> Dict[str, Any]:
         response_type = tool_args.get("response_type")
         action = None
         final_response = {"message": tool_args.get("message", "..."), "interview_complete": False}
@@ -125,6 +373,10 @@ class AIHRPipeline:
         if response_type == "ANSWER":
             action = "next_question"
             self.state.collect_answer(current_question["category"], current_question["question"], user_input)
+            if self.grader is not None:
+                self.grader.submit(current_question["id"], {"question": current_question["question"],
+                                                            "expected_response": current_question["example_answer"]},
+                                   user_input)
             self.state.move_to_next_question()
             next_q = self.state.get_current_question()
             if not next_q:
@@ -145,6 +397,9 @@ class AIHRPipeline:
             else:
                 action = "previous_question"
                 prev_q = self.state.get_current_question()
+                if prev_q and self.grader is not None:
+                    # Ответ на этот вопрос будет перезаписан, его оценка больше не нужна
+                    self.grader.cancel(prev_q["id"])
                 if prev_q:
                     final_response["next_question"] = prev_q["question"]
 
@@ -176,75 +431,310 @@ def _create_evaluation_prompt(question: str, answer: str, expected_response: Opt
     return f"Ты — технический эксперт, оценивающий кандидата на позицию '{vacancy_name}'. Твоя задача — объективно оценить ответ кандидата.\n{expected_text}\n\nПроанализируй связку вопрос-ответ и вызови инструмент `evaluate_answer`.\nВопрос: \"{question}\"\nОтвет кандидата: \"{answer}\""
 
 
-def analyze_interview_data(collected_data: Dict, questions_data: Dict, vacancy_name: str) -> List[Dict]:
+def _create_batch_evaluation_tool_definitions():
+    """Возвращает инструмент для ОЦЕНКИ всех ответов интервью одним вызовом."""
+    return [{"type": "function", "function": {"name": "evaluate_answers",
+                                              "description": "Оценивает все ответы кандидата.",
+                                              "parameters": {"type": "object", "properties": {"evaluations": {
+                                                  "type": "array",
+                                                  "items": {"type": "object",
+                                                            "properties": {"question_id": {"type": "string"},
+                                                                           "score": {"type": "number"},
+                                                                           "passed": {"type": "boolean"},
+                                                                           "feedback": {"type": "string"}},
+                                                            "required": ["question_id", "score", "passed",
+                                                                         "feedback"]}}},
+                                                             "required": ["evaluations"]}}}]
+
+
+def _create_batch_evaluation_prompt(items: List[Dict], vacancy_name: str) -> str:
+    """Создает системный промпт для оценки всего транскрипта, вводная часть передается один раз."""
+    blocks = []
+    for item in items:
+        expected_text = f"Критерии для идеального ответа: {item['expected_response']}" if item[
+            "expected_response"] else "Четких критериев нет. Оцени ответ на основе логичности и полноты."
+        blocks.append(f"[{item['id']}]\nВопрос: \"{item['question']}\"\n{expected_text}\n"
+                      f"Ответ кандидата: \"{item['answer']}\"")
+    transcript = "\n\n".join(blocks)
+    return f"Ты — технический эксперт, оценивающий кандидата на позицию '{vacancy_name}'. Твоя задача — объективно оценить каждый ответ кандидата независимо от остальных.\n\nПроанализируй каждую связку вопрос-ответ и вызови инструмент `evaluate_answers`, вернув по одной оценке на каждый вопрос с его question_id из квадратных скобок.\n\n{transcript}"
+
+
+def _is_valid_evaluation(item: Any) -> bool:
+    return (isinstance(item, dict) and isinstance(item.get("score"), (int, float))
+            and not isinstance(item.get("score"), bool) and isinstance(item.get("passed"), bool)
+            and isinstance(item.get("feedback"), str))
+
+
+def _evaluate_batch(client, response_cache: Optional[LLMCache], labels: Dict, items: List[Dict],
+                    vacancy_name: str) -> Dict[str, Dict]:
+    """
+    Оценивает все ответы одним вызовом инструмента.
+    Возвращает только корректные оценки {question_id: evaluation}, пропущенные и некорректные оцениваются отдельно.
+    """
+    print(f"Анализирую {len(items)} ответов одним запросом")
+    with pipeline_metrics.stage("prompt_build", **labels):
+        system_prompt = _create_batch_evaluation_prompt(items, vacancy_name)
+    try:
+        tool_args = tool_call_cached(client, response_cache, labels, model="deepseek/deepseek-chat-v3.1:free",
+                                     messages=[{"role": "system", "content": system_prompt}],
+                                     tools=_create_batch_evaluation_tool_definitions(),
+                                     tool_choice={"type": "function", "function": {"name": "evaluate_answers"}})
+    except Exception as e:
+        print(f"  - ОШИБКА при пакетной оценке: {e}")
+        return {}
+    known_ids = {item["id"] for item in items}
+    evaluations = {}
+    for item in tool_args.get("evaluations") or []:
+        if _is_valid_evaluation(item) and item.get("question_id") in known_ids:
+            evaluations[item["question_id"]] = {"score": item["score"], "passed": item["passed"],
+                                                "feedback": item["feedback"]}
+    return evaluations
+
+
+def _evaluate_answer(client, evaluation_tool: List[Dict], response_cache: Optional[LLMCache], labels: Dict,
+                     question_data: Dict, candidate_answer: str, vacancy_name: str, quiet: bool = False) -> Dict:
+    """
+    Оценивает один ответ, ошибка оценки не прерывает анализ остальных вопросов.
+    :param quiet: не печатать в консоль, фоновая оценка идет во время интервью и вывод смешался бы с вопросами
+    """
+    if not quiet:
+        print(f"Анализирую ответ на вопрос: '{question_data['question'][:40]}...'")
+    with pipeline_metrics.stage("prompt_build", **labels):
+        system_prompt = _create_evaluation_prompt(question_data["question"], candidate_answer,
+                                                  question_data["expected_response"], vacancy_name)
+    try:
+        tool_args = tool_call_cached(client, response_cache, labels, model="deepseek/deepseek-chat-v3.1:free",
+                                     messages=[{"role": "system", "content": system_prompt}],
+                                     tools=evaluation_tool, tool_choice={"type": "function",
+                                                                         "function": {
+                                                                             "name": "evaluate_answer"}})
+        return {"score": tool_args.get("score"), "passed": tool_args.get("passed"),
+                "feedback": tool_args.get("feedback")}
+    except Exception as e:
+        if not quiet:
+            print(f"  - ОШИБКА при оценке: {e}")
+        return {"error": str(e)}
+
+
+class BackgroundGrader:
+    """
+    Фоновая оценка ответов во время интервью: каждый собранный ответ сразу отправляется в пул потоков.
+    Повторный ответ на тот же вопрос (после PREVIOUS_QUESTION_REQUEST) отменяет или замещает прежнюю задачу,
+    результат замещенной задачи отбрасывается.
+    """
+
+    def __init__(self, vacancy_name: Union[str, VacancyProfile], response_cache: Optional[LLMCache] = None,
+                 max_workers: int = 2, executor: Optional[ThreadPoolExecutor] = None):
+        """
+        :param vacancy_name: название вакансии или VacancyProfile
+        :param executor: общий пул для многих сессий, по умолчанию у грейдера свой пул на max_workers потоков
+        """
+        vacancy_name = vacancy_title(vacancy_name)
+        self.vacancy_name = vacancy_name
+        self.response_cache = response_cache or default_llm_cache()
+        self.labels = {"module": "module3", "vacancy": vacancy_name}
+        self._evaluation_tool = _create_evaluation_tool_definitions()
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="interview-grader")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, tuple] = {}
+
+    def submit(self, question_id: str, question_data: Dict, answer: str) -> Future:
+        """
+        :param question_id: id вопроса из InterviewState
+        :param question_data: {"question", "expected_response"}
+        :param answer: ответ кандидата
+        """
+        with self._lock:
+            self._cancel_locked(question_id)
+            future = self._executor.submit(_evaluate_answer, get_llm_client(), self._evaluation_tool,
+                                           self.response_cache, self.labels, question_data, answer,
+                                           self.vacancy_name, quiet=True)
+            self._jobs[question_id] = (answer, future)
+            return future
+
+    def _cancel_locked(self, question_id: str) -> None:
+        job = self._jobs.pop(question_id, None)
+        if job is not None:
+            job[1].cancel()
+
+    def cancel(self, question_id: str) -> None:
+        with self._lock:
+            self._cancel_locked(question_id)
+
+    def results(self) -> Dict[str, Dict]:
+        """
+        Дожидается актуальных задач. Отмененные (пул остановлен с cancel_futures) и упавшие задачи не попадают
+        в результат, такие ответы analyze_interview_data оценивает заново, как не отправленные в фон
+        :return: {question_id: {"answer", "evaluation"}}
+        """
+        with self._lock:
+            jobs = dict(self._jobs)
+        results = {}
+        for question_id, (answer, future) in jobs.items():
+            try:
+                results[question_id] = {"answer": answer, "evaluation": future.result()}
+            except CancelledError:
+                continue
+            except Exception as e:
+                print(f"[WARN] Фоновая оценка вопроса {question_id} не удалась: {e}")
+        return results
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            return
+        with self._lock:
+            for question_id in list(self._jobs):
+                self._cancel_locked(question_id)
+
+
+def analyze_interview_data(collected_data: Dict, questions_data: Dict, vacancy_name: Union[str, VacancyProfile],
+                           response_cache: Optional[LLMCache] = None, max_workers: int = 1,
+                           batch: bool = False, precomputed: Optional[Dict[str, Dict]] = None) -> List[Dict]:
     """
-    Анализирует собранные результаты, последовательно выставляя оценки каждому ответу.
+    Анализирует собранные результаты, выставляя оценки каждому ответу.
+    При max_workers > 1 ответы оцениваются параллельно, порядок вопросов в отчете сохраняется.
+    При batch=True весь транскрипт оценивается одним вызовом, пропущенные или некорректные
+    оценки из пакетного ответа запрашиваются по отдельности.
+    precomputed - результаты BackgroundGrader.results(), используются только если ответ совпадает с собранным.
+    Оценки берутся из кэша ответов LLM (по умолчанию общий default_llm_cache()), если такой же запрос уже был.
     """
-    print("\n--- НАЧАЛО ПОСЛЕДОВАТЕЛЬНОГО АНАЛИЗА РЕЗУЛЬТАТОВ ---")
-    client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=api_key)
+    if max_workers < 1:
+        raise ValueError("max_workers должен быть не меньше 1")
+    vacancy_name = vacancy_title(vacancy_name)
+    print("\n--- НАЧАЛО АНАЛИЗА РЕЗУЛЬТАТОВ ---")
+    client = get_llm_client()
     evaluation_tool = _create_evaluation_tool_definitions()
-    analysis_report = []
+    response_cache = response_cache or default_llm_cache()
+    labels = {"module": "module3", "vacancy": vacancy_name}
 
     all_questions = []
     for category, questions_list in questions_data.items():
-        for q in questions_list:
+        for i, q in enumerate(questions_list):
             all_questions.append({
+                "id": f"{category}_{i}",
                 "category": category,
                 "question": q.get("question"),
                 "expected_response": q.get("expected_response")
                 })
 
-    for question_data in all_questions:
-        category, question_text, expected_response = question_data["category"], question_data["question"], \
-        question_data["expected_response"]
-        candidate_answer = next(
-            (ans["answer"] for ans in collected_data.get(category, []) if ans["question"] == question_text), None)
-
-        evaluation = {}
+    answers_index = {(category, ans["question"]): ans["answer"]
+                     for category, answers_list in collected_data.items() for ans in answers_list}
+    answers = [answers_index.get((q["category"], q["question"])) for q in all_questions]
+    evaluations = [None] * len(all_questions)
+    for index, (question_data, candidate_answer) in enumerate(zip(all_questions, answers)):
         if candidate_answer is None:
-            print(f"Вопрос '{question_text[:40]}...' пропущен.")
-            evaluation = {"score": 0, "passed": False, "feedback": "Ответ не был дан."}
-        else:
-            print(f"Анализирую ответ на вопрос: '{question_text[:40]}...'")
-            system_prompt = _create_evaluation_prompt(question_text, candidate_answer, expected_response, vacancy_name)
-            try:
-                response = client.chat.completions.create(model="deepseek/deepseek-chat-v3.1:free",
-                                                          messages=[{"role": "system", "content": system_prompt}],
-                                                          tools=evaluation_tool, tool_choice={"type": "function",
-                                                                                              "function": {
-                                                                                                  "name": "evaluate_answer"}})
-                tool_args = json.loads(response.choices[0].message.tool_calls[0].function.arguments)
-                evaluation = {"score": tool_args.get("score"), "passed": tool_args.get("passed"),
-                              "feedback": tool_args.get("feedback")}
-            except Exception as e:
-                print(f"  - ОШИБКА при оценке: {e}")
-                evaluation = {"error": str(e)}
-
-        analysis_report.append({
-            "category": category,
-            "question": question_text,
-            "expected_response": expected_response,
+            print(f"Вопрос '{question_data['question'][:40]}...' пропущен.")
+            evaluations[index] = {"score": 0, "passed": False, "feedback": "Ответ не был дан."}
+            continue
+        ready = (precomputed or {}).get(question_data["id"])
+        if ready and ready["answer"] == candidate_answer and "error" not in ready["evaluation"]:
+            evaluations[index] = ready["evaluation"]
+    pending = [index for index, evaluation in enumerate(evaluations) if evaluation is None]
+
+    if batch and pending:
+        graded = _evaluate_batch(client, response_cache, labels,
+                                 [{**all_questions[index], "answer": answers[index]} for index in pending],
+                                 vacancy_name)
+        for index in pending:
+            evaluations[index] = graded.get(all_questions[index]["id"])
+        pending = [index for index in pending if evaluations[index] is None]
+        if pending:
+            print(f"Пакетная оценка не вернула корректных оценок для {len(pending)} ответов, оцениваю по отдельности")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for index in pending:
+            future = executor.submit(_evaluate_answer, client, evaluation_tool, response_cache, labels,
+                                     all_questions[index], answers[index], vacancy_name)
+            futures[future] = index
+        for future in as_completed(futures):
+            evaluations[futures[future]] = future.result()
+
+    analysis_report = [
+        {
+            "category": question_data["category"],
+            "question": question_data["question"],
+            "expected_response": question_data["expected_response"],
             "answer": candidate_answer or "Ответ не дан.",
             "evaluation": evaluation
-            })
+            }
+        for question_data, candidate_answer, evaluation in zip(all_questions, answers, evaluations)
+        ]
 
     print("\n--- АНАЛИЗ ЗАВЕРШЕН ---")
+    pipeline_metrics.report_totals(f"вакансии '{vacancy_name}'", **labels)
     return analysis_report
 
 
+def _generate_final_summary(feedbacks: List[str], vacancy_name: str, client: LLMTransport,
+                            response_cache: Optional[LLMCache] = None) -> str:
+    if not feedbacks:
+        return "Итоговое резюме не может быть составлено, так как не было получено ни одного отзыва."
+
+    # Соединяем все фидбеки в один текст
+    all_feedbacks_text = "\n- ".join(feedbacks)
+
+    system_prompt = f"""Ты — опытный HR-менеджер. Проанализируй следующие краткие комментарии по ответам кандидата на позицию '{vacancy_name}'. 
+На основе этих комментариев напиши короткую выжимку. Максимально короткую, не более 3-4 предложений в сумме.
+Вот комментарии:
+- {all_feedbacks_text}
+"""
+    try:
+        summary = content_cached(
+            client, response_cache or default_llm_cache(), {"module": "module3", "vacancy": vacancy_name},
+            model="deepseek/deepseek-chat-v3.1:free",
+            messages=[{"role": "system", "content": system_prompt}],
+            temperature=0.2
+            )
+        return summary.strip()
+    except Exception as e:
+        print(f"[ERROR] Не удалось сгенерировать итоговое резюме: {e}")
+        return "Ошибка при генерации итогового резюме."
+
+
+def build_final_report(collected_data: Dict, questions_data: Dict, vacancy_name: Union[str, VacancyProfile],
+                       response_cache: Optional[LLMCache] = None, max_workers: int = 4,
+                       batch: bool = False, grader: Optional[BackgroundGrader] = None) -> Dict:
+    """
+    Итоговый отчет: параллельная (или пакетная при batch=True) оценка ответов и краткое резюме,
+    которое генерируется сразу после последней оценки.
+    С grader оцениваются только ответы, которых нет среди готовых фоновых оценок.
+    """
+    vacancy_name = vacancy_title(vacancy_name)
+    precomputed = grader.results() if grader is not None else None
+    analysis_report = analyze_interview_data(collected_data, questions_data, vacancy_name,
+                                             response_cache=response_cache, max_workers=max_workers, batch=batch,
+                                             precomputed=precomputed)
+    feedbacks = [item["evaluation"]["feedback"] for item in analysis_report
+                 if item["evaluation"].get("feedback") and "error" not in item["evaluation"]]
+    summary = _generate_final_summary(feedbacks, vacancy_name, get_llm_client(), response_cache=response_cache)
+    return {"vacancy": vacancy_name, "summary": summary, "analysis_report": analysis_report}
+
+
 # ==============================================================================
 # БЛОК 3: ТОЧКА ВХОДА И ОРКЕСТРАЦИЯ
 # ==============================================================================
 
-if __name__ == '__main__':
-    vacancy = "Ведущий специалист по обслуживанию ЦОД"
-
+def run_console_interview(questions_data: Dict, vacancy: Union[str, VacancyProfile],
+                          session_store: Optional[SessionStore] = None, session_id: Optional[str] = None,
+                          output_dir: str = ".") -> Optional[Dict]:
+    """
+    Интервью в консоли: диалог с кандидатом, затем сохранение "сырых" данных и итоговый отчет в output_dir.
+    С session_store и session_id существующая сессия продолжается с текущего вопроса.
+    :return: итоговый отчет или None, если данных для анализа нет
+    """
     # --- ЭТАП 1: ПРОВЕДЕНИЕ ИНТЕРВЬЮ ---
-    pipeline = AIHRPipeline(interview_questions2, vacancy_name=vacancy)
-    print(pipeline.start_interview())
-
+    pipeline = AIHRPipeline(questions_data, vacancy_name=vacancy, session_store=session_store, session_id=session_id)
     raw_data = {}
-    while True:
+    final_report = None
+    if pipeline.state.is_interview_complete():
+        print("Интервью уже завершено, переходим к анализу.")
+        raw_data = pipeline.state.collected_data_by_category
+    else:
+        print(pipeline.start_interview())
+    while not raw_data:
         try:
             user_input = input("\nКандидат: ")
             if user_input.lower() in ['quit', 'exit', 'завершить']:
@@ -272,7 +762,7 @@ if __name__ == '__main__':
     # --- ЭТАП 2: СОХРАНЕНИЕ "СЫРЫХ" ДАННЫХ И ПОСЛЕДУЮЩИЙ АНАЛИЗ ---
     if raw_data:
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        raw_filename = f"interview_results_{timestamp}.json"
+        raw_filename = os.path.join(output_dir, f"interview_results_{timestamp}.json")
         try:
             with open(raw_filename, 'w', encoding='utf-8') as f:
                 json.dump(raw_data, f, ensure_ascii=False, indent=4)
@@ -281,17 +771,18 @@ if __name__ == '__main__':
             print(f"\n[ERROR] Не удалось сохранить 'сырые' данные: {e}")
 
         # Запускаем анализ
-        final_report = analyze_interview_data(
+        final_report = build_final_report(
             collected_data=raw_data,
-            questions_data=interview_questions2,
-            vacancy_name=vacancy
+            questions_data=questions_data,
+            vacancy_name=vacancy,
+            grader=pipeline.grader
             )
 
         print("\n--- ИТОГОВЫЙ ОТЧЕТ ПО КАНДИДАТУ ---")
         print(json.dumps(final_report, indent=2, ensure_ascii=False))
 
         # Сохраняем итоговый отчет
-        report_filename = f"final_report_{timestamp}.json"
+        report_filename = os.path.join(output_dir, f"final_report_{timestamp}.json")
         try:
             with open(report_filename, 'w', encoding='utf-8') as f:
                 json.dump(final_report, f, ensure_ascii=False, indent=4)
@@ -300,28 +791,15 @@ if __name__ == '__main__':
             print(f"\n[ERROR] Не удалось сохранить итоговый отчет: {e}")
     else:
         print("\nНет данных для анализа.")
+    print(f"[INFO] Задержка ходов по уровням: {json.dumps(pipeline.turn_latency(), ensure_ascii=False)}")
+    if pipeline.grader is not None:
+        pipeline.grader.close()
+    return final_report
 
 
-def _generate_final_summary(feedbacks: List[str], vacancy_name: str, client: OpenAI) -> str:
-    if not feedbacks:
-        return "Итоговое резюме не может быть составлено, так как не было получено ни одного отзыва."
-
-    # Соединяем все фидбеки в один текст
-    all_feedbacks_text = "\n- ".join(feedbacks)
+if __name__ == '__main__':
+    from testing.entries import interview_questions2
 
-    system_prompt = f"""Ты — опытный HR-менеджер. Проанализируй следующие краткие комментарии по ответам кандидата на позицию '{vacancy_name}'. 
-На основе этих комментариев напиши короткую выжимку. Максимально короткую, не более 3-4 предложений в сумме.
-Вот комментарии:
-- {all_feedbacks_text}
-"""
-    try:
-        response = client.chat.completions.create(
-            model="deepseek/deepseek-chat-v3.1:free",
-            messages=[{"role": "system", "content": system_prompt}],
-            temperature=0.2
-            )
-        summary = response.choices[0].message.content
-        return summary.strip()
-    except Exception as e:
-        print(f"[ERROR] Не удалось сгенерировать итоговое резюме: {e}")
-        return "Ошибка при генерации итогового резюме."
+    # python -m module3.module3 [описание вакансии.docx], без файла - вакансия по умолчанию
+    vacancy = load_vacancy_profile(sys.argv[1]) if len(sys.argv) > 1 else "Ведущий специалист по обслуживанию ЦОД"
+    run_console_interview(interview_questions2, vacancy)
@@ -0,0 +1,270 @@
+"""
+Асинхронный сервер сессий интервью: один процесс ведет много интервью AIHRPipeline одновременно, сессии по session_id.
+Сообщение интервьюера отдается по токенам по мере генерации, чтобы синтез речи начинал говорить до конца ответа.
+Протокол - JSON строки поверх TCP, одна строка на запрос:
+    {"type": "start", "session_id": "...", "vacancy": "...", "questions": {...}}   session_id, vacancy, questions необязательны
+    {"type": "input", "session_id": "...", "text": "..."}
+    {"type": "report", "session_id": "..."}
+    {"type": "close", "session_id": "..."}
+На input приходят события {"type": "token", "session_id", "text"} и в конце {"type": "done", "session_id", ...},
+где остальные поля - результат AIHRPipeline.process_user_input. Ошибки - {"type": "error", "message"}.
+Запуск: python -m module3.session_server --port 8765 --questions questions.json --vacancy "..."
+Для проверки без сети: python -m module1.convert_functions.fake_server --port 8000 --token-interval 0.02
+и LLM_BASE_URL=http://127.0.0.1:8000/v1
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Dict, Optional
+
+from module1.convert_functions.transport import reserve_model_concurrency
+from module1.convert_functions.vacancy_profile import load_vacancy_profile
+from module3.module3 import AIHRPipeline, build_final_report
+from module3.session_store import SessionStore
+
+_DONE = object()
+STREAM_LIMIT = 4 * 1024 * 1024
+
+
+class InterviewSessionService:
+    """
+    Хранит сессии AIHRPipeline. Вызовы модели блокирующие и выполняются в общем пуле потоков,
+    ходы одной сессии выполняются строго по очереди, разные сессии - параллельно.
+    С session_store состояние сессий сохраняется в SQLite, в памяти держится не больше max_resident
+    последних активных сессий, остальные восстанавливаются из хранилища при следующем запросе.
+    """
+
+    def __init__(self, questions_data: Optional[Dict] = None, vacancy_name: Optional[str] = None,
+                 max_workers: int = 64, grading_workers: int = 8, session_store: Optional[SessionStore] = None,
+                 max_resident: int = 1024, **pipeline_kwargs):
+        """
+        :param questions_data: вопросы по умолчанию для новых сессий
+        :param vacancy_name: вакансия по умолчанию для новых сессий
+        :param max_workers: потоки для ходов интервью (одновременные вызовы модели)
+        :param grading_workers: общий пул фоновой оценки ответов всех сессий
+        :param session_store: хранилище сессий, без него сессии живут только в памяти
+        :param max_resident: сколько сессий держать в памяти при наличии session_store
+        :param pipeline_kwargs: параметры AIHRPipeline (fast_path_threshold, background_grading ...)
+        """
+        self.questions_data = questions_data
+        self.vacancy_name = vacancy_name
+        self.pipeline_kwargs = pipeline_kwargs
+        self.session_store = session_store
+        self.max_resident = max_resident
+        # ходы и фоновая оценка всех сессий идут через общий транспорт, лимит модели не ниже их потоков
+        reserve_model_concurrency(max_workers + grading_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="interview-session")
+        self._grading_executor = ThreadPoolExecutor(max_workers=grading_workers, thread_name_prefix="interview-grader")
+        self._sessions: "OrderedDict[str, AIHRPipeline]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pins: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _keep(self, session_id: str, pipeline: AIHRPipeline) -> None:
+        self._sessions[session_id] = pipeline
+        self._sessions.move_to_end(session_id)
+        self._locks.setdefault(session_id, asyncio.Lock())
+        self._evict(keep=session_id)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        if self.session_store is None:
+            return
+        while len(self._sessions) > self.max_resident:
+            # Состояние уже в хранилище, из памяти выгружаем самую давнюю сессию, которая сейчас не используется
+            evicted_id = next((sid for sid in self._sessions if sid != keep and not self._pins.get(sid)), None)
+            if evicted_id is None:
+                break
+            self._sessions.pop(evicted_id)
+            self._locks.pop(evicted_id)
+
+    async def _get(self, session_id: str) -> AIHRPipeline:
+        pipeline = self._sessions.get(session_id)
+        if pipeline is not None:
+            self._sessions.move_to_end(session_id)
+            return pipeline
+        if self.session_store is None or not self.session_store.has_session(session_id):
+            raise KeyError(f"Сессия {session_id} не найдена")
+        pipeline = await self._run(partial(AIHRPipeline.restore, self.session_store, session_id,
+                                           grader_executor=self._grading_executor, **self.pipeline_kwargs))
+        if session_id not in self._sessions:
+            self._keep(session_id, pipeline)
+        return self._sessions[session_id]
+
+    @asynccontextmanager
+    async def _use(self, session_id: str):
+        """Берет сессию на время хода: она не выгружается из памяти, ходы одной сессии идут по очереди"""
+        pipeline = await self._get(session_id)
+        self._pins[session_id] = self._pins.get(session_id, 0) + 1
+        try:
+            async with self._locks[session_id]:
+                yield pipeline
+        finally:
+            self._pins[session_id] -= 1
+            if not self._pins[session_id]:
+                del self._pins[session_id]
+                self._evict()
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+    async def start_session(self, session_id: Optional[str] = None, questions_data: Optional[Dict] = None,
+                            vacancy_name: Optional[str] = None) -> Dict:
+        """
+        :return: {"session_id", "message"} с приветствием и первым вопросом
+        """
+        session_id = session_id or uuid.uuid4().hex
+        if session_id in self._sessions or (self.session_store and self.session_store.has_session(session_id)):
+            raise ValueError(f"Сессия {session_id} уже существует")
+        questions_data = questions_data or self.questions_data
+        vacancy_name = vacancy_name or self.vacancy_name
+        if not questions_data or not vacancy_name:
+            raise ValueError("Для сессии не заданы вопросы или вакансия")
+        pipeline = await self._run(partial(AIHRPipeline, questions_data, vacancy_name,
+                                           grader_executor=self._grading_executor, session_store=self.session_store,
+                                           session_id=session_id, **self.pipeline_kwargs))
+        self._keep(session_id, pipeline)
+        return {"session_id": session_id, "message": pipeline.start_interview()}
+
+    async def stream_turn(self, session_id: str, text: str) -> AsyncIterator[Dict]:
+        """
+        Обрабатывает реплику кандидата
+        :return: асинхронный итератор событий token, последним идет done
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def on_token(token: str) -> None:
+            loop.call_soon_threadsafe(events.put_nowait, {"type": "token", "session_id": session_id, "text": token})
+
+        async with self._use(session_id) as pipeline:
+            future = loop.run_in_executor(self._executor, partial(pipeline.process_user_input, text, on_token))
+            # Колбэк ставится в очередь цикла после всех токенов, отправленных до завершения хода
+            future.add_done_callback(lambda _: events.put_nowait(_DONE))
+            while True:
+                event = await events.get()
+                if event is _DONE:
+                    break
+                yield event
+            result = await future
+        yield {"type": "done", "session_id": session_id, **result}
+
+    async def turn(self, session_id: str, text: str) -> Dict:
+        """Реплика без потоковой выдачи, возвращает событие done"""
+        result = None
+        async for event in self.stream_turn(session_id, text):
+            result = event
+        return result
+
+    async def report(self, session_id: str) -> Dict:
+        """Итоговый отчет по собранным ответам, готовые фоновые оценки переиспользуются"""
+        async with self._use(session_id) as pipeline:
+            return await self._run(partial(build_final_report, pipeline.state.collected_data_by_category,
+                                           pipeline.questions_data, pipeline.vacancy_name, grader=pipeline.grader))
+
+    async def close_session(self, session_id: str) -> Dict:
+        """
+        Выгружает сессию из памяти, в session_store она остается и доступна для отчета
+        :return: собранные ответы сессии
+        """
+        async with self._use(session_id) as pipeline:
+            self._sessions.pop(session_id, None)
+        self._locks.pop(session_id, None)
+        if pipeline.grader is not None:
+            pipeline.grader.close()
+        return {"session_id": session_id, "collected_data": pipeline.state.collected_data_by_category}
+
+    async def _dispatch(self, request: Dict, writer: asyncio.StreamWriter) -> None:
+        request_type = request.get("type")
+        session_id = request.get("session_id")
+        if request_type == "start":
+            events = [{"type": "started", **await self.start_session(session_id, request.get("questions"),
+                                                                     request.get("vacancy"))}]
+        elif request_type == "input":
+            async for event in self.stream_turn(session_id, request.get("text", "")):
+                await _write(writer, event)
+            return
+        elif request_type == "report":
+            events = [{"type": "report", "session_id": session_id, **await self.report(session_id)}]
+        elif request_type == "close":
+            events = [{"type": "closed", **await self.close_session(session_id)}]
+        else:
+            raise ValueError(f"Неизвестный тип запроса: {request_type}")
+        for event in events:
+            await _write(writer, event)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    await self._dispatch(json.loads(line), writer)
+                except (KeyError, ValueError) as e:
+                    await _write(writer, {"type": "error", "message": str(e).strip("'")})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port, limit=STREAM_LIMIT)
+
+    def close(self) -> None:
+        for pipeline in self._sessions.values():
+            if pipeline.grader is not None:
+                pipeline.grader.close()
+        self._sessions.clear()
+        self._locks.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._grading_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _write(writer: asyncio.StreamWriter, event: Dict) -> None:
+    writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions_data = json.load(f)
+    else:
+        from testing.entries import interview_questions2
+        questions_data = interview_questions2
+    store = SessionStore(args.store) if args.store else None
+    vacancy = load_vacancy_profile(args.vacancy_file).name if args.vacancy_file else args.vacancy
+    service = InterviewSessionService(questions_data, vacancy, max_workers=args.workers, session_store=store,
+                                      max_resident=args.max_resident)
+    server = await service.serve(args.host, args.port)
+    print(f"[INFO] Сервер сессий интервью запущен: {args.host}:{args.port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Асинхронный сервер сессий интервью с потоковой выдачей ответов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--questions", help="JSON с вопросами {категория: [{question, expected_response}]}")
+    parser.add_argument("--vacancy", default="Ведущий специалист по обслуживанию ЦОД")
+    parser.add_argument("--vacancy-file", help="описание вакансии, название берется из него вместо --vacancy")
+    parser.add_argument("--workers", type=int, default=64, help="одновременные ходы интервью")
+    parser.add_argument("--store", help="SQLite файл для сохранения сессий между перезапусками")
+    parser.add_argument("--max-resident", type=int, default=1024, help="сессий в памяти при --store")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
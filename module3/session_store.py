@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "interview_sessions.sqlite3")
+DEFAULT_MAX_RESIDENT = 256
+
+
+class SessionStore:
+    """
+    Хранилище сессий интервью в SQLite с индексом ответов по id вопроса в памяти.
+    Каждое изменение сразу пишется в базу (write-through), поэтому после перезапуска процесса
+    сессию можно восстановить. В памяти держится не больше max_resident последних сессий (LRU),
+    остальные загружаются из базы по требованию.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_resident: int = DEFAULT_MAX_RESIDENT):
+        """
+        :param path: путь к sqlite файлу, по умолчанию INTERVIEW_SESSIONS_PATH env или .cache/interview_sessions.sqlite3
+        :param max_resident: сколько сессий держать в памяти
+        """
+        self.path = path or os.getenv("INTERVIEW_SESSIONS_PATH", DEFAULT_STORE_PATH)
+        self.max_resident = max_resident
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[str, Dict]" = OrderedDict()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, vacancy TEXT, questions TEXT, questions_asked INTEGER, updated REAL)"
+            )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "session_id TEXT, question_id TEXT, position INTEGER, category TEXT, question TEXT, answer TEXT, "
+            "PRIMARY KEY (session_id, question_id))"
+            )
+        self._conn.commit()
+
+    def _remember(self, session_id: str, record: Dict) -> Dict:
+        self._resident[session_id] = record
+        self._resident.move_to_end(session_id)
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+        return record
+
+    def _load_locked(self, session_id: str) -> Optional[Dict]:
+        record = self._resident.get(session_id)
+        if record is not None:
+            self._resident.move_to_end(session_id)
+            return record
+        row = self._conn.execute("SELECT vacancy, questions, questions_asked FROM sessions WHERE session_id = ?",
+                                 (session_id,)).fetchone()
+        if row is None:
+            return None
+        rows = self._conn.execute(
+            "SELECT question_id, category, question, answer FROM answers WHERE session_id = ? ORDER BY position",
+            (session_id,)
+            )
+        answers = {question_id: {"category": category, "question": question, "answer": answer}
+                   for question_id, category, question, answer in rows}
+        return self._remember(session_id, {"vacancy": row[0], "questions_data": json.loads(row[1]),
+                                           "questions_asked": row[2], "answers": answers})
+
+    def open_session(self, session_id: str, vacancy_name: str, questions_data: Dict) -> Dict:
+        """
+        Загружает сессию или создает новую
+        :return: запись {vacancy, questions_data, questions_asked, answers: {question_id: {category, question, answer}}}
+        """
+        with self._lock:
+            record = self._load_locked(session_id)
+            if record is not None:
+                return record
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, vacancy, questions, questions_asked, updated) VALUES (?, ?, ?, 0, ?)",
+                (session_id, vacancy_name, json.dumps(questions_data, ensure_ascii=False), time.time())
+                )
+            self._conn.commit()
+            return self._remember(session_id, {"vacancy": vacancy_name, "questions_data": questions_data,
+                                               "questions_asked": 0, "answers": {}})
+
+    def load_session(self, session_id: str) -> Dict:
+        """
+        :return: запись сессии, KeyError если сессии нет
+        """
+        with self._lock:
+            record = self._load_locked(session_id)
+        if record is None:
+            raise KeyError(f"Сессия {session_id} не найдена")
+        return record
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id in self._resident:
+                return True
+            return self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?",
+                                      (session_id,)).fetchone() is not None
+
+    def upsert_answer(self, session_id: str, question_id: str, category: str, question: str, answer: str) -> None:
+        """Замена ответа переносит его в конец, как и раньше в collect_answer"""
+        entry = {"category": category, "question": question, "answer": answer}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (session_id, question_id, position, category, question, answer) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM answers WHERE session_id = ?), ?, ?, ?)",
+                (session_id, question_id, session_id, category, question, answer)
+                )
+            self._conn.execute("UPDATE sessions SET updated = ? WHERE session_id = ?", (time.time(), session_id))
+            self._conn.commit()
+            record = self._resident.get(session_id)
+            if record is not None:
+                record["answers"].pop(question_id, None)
+                record["answers"][question_id] = entry
+
+    def get_answer(self, session_id: str, question_id: str) -> Optional[str]:
+        with self._lock:
+            record = self._resident.get(session_id)
+            if record is not None:
+                entry = record["answers"].get(question_id)
+                return entry["answer"] if entry else None
+            row = self._conn.execute("SELECT answer FROM answers WHERE session_id = ? AND question_id = ?",
+                                     (session_id, question_id)).fetchone()
+            return row[0] if row else None
+
+    def save_progress(self, session_id: str, questions_asked: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET questions_asked = ?, updated = ? WHERE session_id = ?",
+                               (questions_asked, time.time(), session_id))
+            self._conn.commit()
+            record = self._resident.get(session_id)
+            if record is not None:
+                record["questions_asked"] = questions_asked
+
+    def snapshot(self, session_id: str) -> Dict:
+        """
+        :return: JSON-совместимый снимок сессии для переноса или резервной копии
+        """
+        record = self.load_session(session_id)
+        with self._lock:
+            return {"session_id": session_id, "vacancy": record["vacancy"],
+                    "questions_data": record["questions_data"], "questions_asked": record["questions_asked"],
+                    "answers": [{"question_id": question_id, **entry}
+                                for question_id, entry in record["answers"].items()]}
+
+    def restore(self, snapshot: Dict) -> None:
+        """Записывает снимок, существующая сессия с тем же id заменяется"""
+        session_id = snapshot["session_id"]
+        with self._lock:
+            self._resident.pop(session_id, None)
+            self._conn.execute("DELETE FROM answers WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, vacancy, questions, questions_asked, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, snapshot["vacancy"], json.dumps(snapshot["questions_data"], ensure_ascii=False),
+                 snapshot["questions_asked"], time.time())
+                )
+            self._conn.executemany(
+                "INSERT INTO answers (session_id, question_id, position, category, question, answer) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(session_id, entry["question_id"], position, entry["category"], entry["question"], entry["answer"])
+                 for position, entry in enumerate(snapshot["answers"])]
+                )
+            self._conn.commit()
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            self._resident.pop(session_id, None)
+            self._conn.execute("DELETE FROM answers WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions ORDER BY updated")]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,258 @@
+"""
+Pipelined end-to-end run: screening (module1) -> questions (module2) -> report (module3).
+Stages are connected by bounded queues and run concurrently: questions for a candidate are generated as soon as
+the candidate is accepted, while the rest of the folder is still being screened.
+Report stage writes a candidate card (screening, questions) and, if session_store is passed, either registers
+an interview session for the candidate (session_id = path to cv) or builds final report when the interview is done.
+Run from repo root:
+    python -m orchestrator <folder with cv> <vacancy.docx> --output results --screen-workers 4 --question-workers 2
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from module1.convert_functions.convert_functions import write_json
+from module1.convert_functions.llm_cache import LLMCache, default_llm_cache
+from module1.convert_functions.transport import get_llm_client
+from module1.convert_functions.vacancy_profile import load_vacancy_profile
+from module1.module1 import iter_accepted_candidates
+from module2.module2 import default_tts_normalizer, generate_candidate_questions, get_question_bank
+from module3.session_store import SessionStore
+
+_STOP = object()
+STAGES = ("screening", "questions", "report")
+
+
+class PipelineProgress:
+    """
+    Counters of pipeline stages with live view in terminal (rich if installed, otherwise plain lines)
+    """
+
+    def __init__(self, total_cv: int, show: bool = True):
+        self._lock = threading.Lock()
+        self.counts = {stage: {"total": 0, "done": 0, "failed": 0} for stage in STAGES}
+        self.counts["screening"]["total"] = total_cv
+        self.accepted = 0
+        self.started = time.perf_counter()
+        self._view = None
+        self._tasks = {}
+        self.show = show
+        if show:
+            try:
+                from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+                self._view = Progress(TextColumn("{task.description:12}"), BarColumn(), MofNCompleteColumn(),
+                                      TimeElapsedColumn())
+            except ImportError:
+                self._view = None
+
+    def __enter__(self) -> "PipelineProgress":
+        if self._view is not None:
+            self._view.start()
+            for stage in STAGES:
+                self._tasks[stage] = self._view.add_task(stage, total=self.counts[stage]["total"] or None)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._view is not None:
+            self._view.stop()
+
+    def _refresh(self, stage: str) -> None:
+        counts = self.counts[stage]
+        if self._view is not None:
+            self._view.update(self._tasks[stage], total=counts["total"], completed=counts["done"] + counts["failed"])
+        elif self.show:
+            print(" | ".join(f"{name}: {self.counts[name]['done'] + self.counts[name]['failed']}/"
+                             f"{self.counts[name]['total']}" for name in STAGES))
+
+    def accept(self) -> None:
+        """Accepted candidate is expected by questions and report stages"""
+        with self._lock:
+            self.accepted += 1
+            for stage in ("questions", "report"):
+                self.counts[stage]["total"] += 1
+                self._refresh(stage)
+
+    def advance(self, stage: str, failed: bool = False) -> None:
+        with self._lock:
+            self.counts[stage]["failed" if failed else "done"] += 1
+            self._refresh(stage)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"stages": {stage: dict(counts) for stage, counts in self.counts.items()},
+                    "accepted": self.accepted, "seconds": round(time.perf_counter() - self.started, 3)}
+
+
+def _report_stage(file: str, questions: dict, vacancy_name: str, session_store: Optional[SessionStore],
+                  response_cache: Optional[LLMCache]) -> dict:
+    """
+    :return: {status} and final report if interview of candidate is finished
+    """
+    if session_store is None:
+        return {"status": "awaiting_interview"}
+    if not session_store.has_session(file):
+        session_store.open_session(file, vacancy_name, questions)
+        return {"status": "interview_scheduled", "session_id": file}
+    record = session_store.load_session(file)
+    total_questions = sum(len(questions_list) for questions_list in record["questions_data"].values())
+    if record["questions_asked"] < total_questions:
+        return {"status": "interview_in_progress", "session_id": file}
+    from module3.module3 import InterviewState, build_final_report
+    state = InterviewState(record["questions_data"], session_store, file, record["vacancy"])
+    report = build_final_report(state.collected_data_by_category, record["questions_data"], record["vacancy"],
+                                response_cache=response_cache)
+    return {"status": "reported", "session_id": file, "report": report}
+
+
+def run_pipeline(folder_cv_path: str, info_cv_path: str, output_dir: Optional[str] = None,
+                 screening_options: Optional[dict] = None, question_workers: int = 2, report_workers: int = 1,
+                 queue_size: int = 16, session_store: Optional[SessionStore] = None, use_question_bank: bool = True,
+                 response_cache: Optional[LLMCache] = None, show_progress: bool = True) -> Dict[str, dict]:
+    """
+    Function for running screening, question generation and report stages as pipeline
+    :param folder_cv_path: folder with all CV loaded for selected info_cv
+    :param info_cv_path: path for vacancy describe
+    :param output_dir: folder for candidate cards <cv name>.json and summary.json, None - nothing is written
+    :param screening_options: options of module1 screening (max_workers, requests_per_second, checkpoint_path, ...)
+    :param question_workers: number of candidates with questions generated concurrently
+    :param report_workers: number of candidates in report stage concurrently
+    :param queue_size: capacity of queues between stages, full queue pauses previous stage
+    :param session_store: interview sessions, report stage schedules interviews and builds final reports
+    :param use_question_bank: generate general and soft skills questions once per vacancy
+    :param response_cache: cache of LLM responses, by default shared cache from default_llm_cache()
+    :param show_progress: show progress of stages in terminal
+    :return: dict {cv path: candidate card} for accepted candidates
+    """
+    if question_workers < 1 or report_workers < 1:
+        raise ValueError("Количество потоков этапов должно быть не меньше 1")
+    screening_options = dict(screening_options or {})
+    response_cache = response_cache or default_llm_cache()
+    screening_options.setdefault("response_cache", response_cache)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # вакансия разбирается один раз, скрининг и вопросы получают тот же VacancyProfile
+    vacancy = load_vacancy_profile(info_cv_path)
+    vacancy_name = vacancy.name
+    labels = {"module": "module2", "vacancy": vacancy_name}
+    # этапы идут параллельно и обращаются к модели одновременно
+    client = get_llm_client(screening_options.get("max_workers", 1) + question_workers + report_workers)
+    tts_normalizer = default_tts_normalizer()
+    bank_lock = threading.Lock()
+    bank = []
+
+    def question_bank():
+        if not use_question_bank:
+            return None
+        with bank_lock:
+            if not bank:
+                bank.append(tts_normalizer.apply(get_question_bank(vacancy, client, response_cache, labels)))
+            return bank[0]
+
+    candidates_queue = queue.Queue(maxsize=queue_size)
+    reports_queue = queue.Queue(maxsize=queue_size)
+    screening_status = {}
+    results = {}
+    results_lock = threading.Lock()
+    total_cv = sum(os.path.isfile(os.path.join(folder_cv_path, file)) for file in os.listdir(folder_cv_path))
+    progress = PipelineProgress(total_cv, show=show_progress)
+
+    def on_screened(file: str, result: dict) -> None:
+        failed = "error" in result
+        screening_status[file] = "error" if failed else ("accepted" if result.get("answer") else "rejected")
+        progress.advance("screening", failed=failed)
+        if result.get("answer"):
+            progress.accept()
+
+    def question_worker() -> None:
+        while True:
+            candidate = candidates_queue.get()
+            if candidate is _STOP:
+                break
+            try:
+                questions = generate_candidate_questions(candidate, vacancy, question_bank(), client, response_cache,
+                                                         labels, tts_normalizer)
+                progress.advance("questions")
+                reports_queue.put((candidate, questions, None))
+            except Exception as e:
+                print(f"Ошибка генерации вопросов для {candidate.file}: {e}")
+                progress.advance("questions", failed=True)
+                reports_queue.put((candidate, None, str(e)))
+
+    def report_worker() -> None:
+        while True:
+            item = reports_queue.get()
+            if item is _STOP:
+                break
+            candidate, questions, error = item
+            card = {"file": candidate.file, "vacancy": vacancy_name,
+                    "screening": candidate.analysis.model_dump(), "questions": questions}
+            try:
+                if error is not None:
+                    raise RuntimeError(error)
+                card.update(_report_stage(candidate.file, questions, vacancy_name, session_store, response_cache))
+                progress.advance("report")
+            except Exception as e:
+                card.update({"status": "error", "error": str(e)})
+                progress.advance("report", failed=True)
+            if output_dir:
+                try:
+                    write_json(os.path.join(output_dir, f"{os.path.basename(candidate.file)}.json"), card)
+                except OSError as e:
+                    print(f"[ERROR] Не удалось сохранить карточку {candidate.file}: {e}")
+            with results_lock:
+                results[candidate.file] = card
+
+    workers = [threading.Thread(target=question_worker, name=f"questions-{i}", daemon=True)
+               for i in range(question_workers)]
+    reporters = [threading.Thread(target=report_worker, name=f"report-{i}", daemon=True)
+                 for i in range(report_workers)]
+    with progress:
+        for thread in workers + reporters:
+            thread.start()
+        try:
+            for candidate in iter_accepted_candidates(folder_cv_path, vacancy, on_result=on_screened,
+                                                      **screening_options):
+                candidates_queue.put(candidate)
+        finally:
+            for _ in workers:
+                candidates_queue.put(_STOP)
+            for thread in workers:
+                thread.join()
+            for _ in reporters:
+                reports_queue.put(_STOP)
+            for thread in reporters:
+                thread.join()
+
+    summary = {"vacancy": vacancy_name, "progress": progress.snapshot(), "screening": screening_status,
+               "candidates": {file: card.get("status") for file, card in results.items()}}
+    if output_dir:
+        write_json(os.path.join(output_dir, "summary.json"), summary)
+    print(f"[INFO] Конвейер завершен: {json.dumps(summary['progress'], ensure_ascii=False)}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Конвейер скрининг -> вопросы -> отчет")
+    parser.add_argument("folder_cv", help="папка с CV")
+    parser.add_argument("vacancy", help="файл с описанием вакансии")
+    parser.add_argument("--output", default="pipeline_results", help="папка для карточек кандидатов")
+    parser.add_argument("--screen-workers", type=int, default=4, help="одновременные запросы скрининга")
+    parser.add_argument("--rps", type=float, default=1.0, help="лимит запросов скрининга в секунду")
+    parser.add_argument("--question-workers", type=int, default=2, help="одновременная генерация вопросов")
+    parser.add_argument("--report-workers", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=16, help="емкость очередей между этапами")
+    parser.add_argument("--checkpoint", help="JSONL чекпоинт скрининга для продолжения прерванного запуска")
+    parser.add_argument("--dedup", type=float, help="порог сходства, с которого CV считаются дубликатами (0.8)")
+    parser.add_argument("--sessions", help="SQLite хранилище сессий интервью")
+    args = parser.parse_args()
+
+    run_pipeline(args.folder_cv, args.vacancy, output_dir=args.output,
+                 screening_options={"max_workers": args.screen_workers, "requests_per_second": args.rps,
+                                    "checkpoint_path": args.checkpoint, "dedup_threshold": args.dedup},
+                 question_workers=args.question_workers, report_workers=args.report_workers,
+                 queue_size=args.queue_size, session_store=SessionStore(args.sessions) if args.sessions else None)
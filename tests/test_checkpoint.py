@@ -0,0 +1,21 @@
+from module1.convert_functions.checkpoint import JsonlCheckpoint
+
+
+def test_append_after_truncated_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"file": "a.docx", "result": {"answer": true}}\n{"file": "b.docx", "res', encoding="utf-8")
+
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.append("c.docx", {"answer": False})
+
+    assert list(checkpoint.iter_results()) == [("a.docx", {"answer": True}), ("c.docx", {"answer": False})]
+    assert checkpoint.done_files() == {"a.docx", "c.docx"}
+
+
+def test_append_keeps_complete_file(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = JsonlCheckpoint(str(path))
+    checkpoint.append("a.docx", {"answer": True})
+    JsonlCheckpoint(str(path)).append("b.docx", {"error": "timeout"})
+
+    assert list(checkpoint.iter_results()) == [("a.docx", {"answer": True}), ("b.docx", {"error": "timeout"})]
@@ -0,0 +1,26 @@
+from datetime import date
+
+from module1.convert_functions.prefilter import RequirementFilter, _cv_years
+
+
+def test_required_years_range_takes_lower_bound():
+    assert RequirementFilter({"Опыт работы": "опыт 3-5 лет"}).required_years == 3.0
+    assert RequirementFilter({"Опыт работы": "от 2 до 4 лет"}).required_years == 2.0
+    assert RequirementFilter({"Опыт работы": "от 3-х лет"}).required_years == 3.0
+    assert RequirementFilter({"Опыт работы": "5+ лет"}).required_years == 5.0
+
+
+def test_cv_years_merges_overlapping_jobs():
+    text = "Опыт работы: 2015-2020 инженер ЦОД, 2018-2021 администратор по совместительству, 2021-2023 ведущий инженер"
+    assert _cv_years(text) == 8.0
+
+
+def test_cv_years_skips_education():
+    text = ("Иванов Иван. Образование: 2005-2010 МГТУ им. Баумана, курсы 2011-2012. "
+            "Опыт работы: 2012-2020 инженер ЦОД")
+    assert _cv_years(text) == 8.0
+    assert _cv_years("Высшее техническое образование, 2012-2020 инженер ЦОД") == 8.0
+
+
+def test_cv_years_open_range():
+    assert _cv_years(f"Опыт работы: {date.today().year - 4} - по н.в. инженер") == 4.0